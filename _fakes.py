@@ -0,0 +1,34 @@
+"""
+Lightweight test doubles for pymongo objects.
+"""
+
+
+class FakeCursor:
+    """Chainable stand-in for a pymongo Cursor that records its calls."""
+    
+    __slots__ = ("docs", "sort_calls", "skip_calls", "limit_calls", "close_calls")
+    
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.sort_calls = []
+        self.skip_calls = []
+        self.limit_calls = []
+        self.close_calls = 0
+    
+    def sort(self, spec):
+        self.sort_calls.append(spec)
+        return self
+    
+    def skip(self, n):
+        self.skip_calls.append(n)
+        return self
+    
+    def limit(self, n):
+        self.limit_calls.append(n)
+        return self
+    
+    def close(self):
+        self.close_calls += 1
+    
+    def __iter__(self):
+        return iter(self.docs)
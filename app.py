@@ -1,41 +1,83 @@
 from jupyter_dash import JupyterDash
 JupyterDash.infer_jupyter_proxy_config()
 
-import base64
 import os
 import logging
-import pandas as pd
 
 import dash_leaflet as dl
 from dash import dcc, html
 import plotly.express as px
 from dash import dash_table
 from dash.dependencies import Input, Output
+from flask_caching import Cache
 
 from logging_config import configure_logging
 from data.mongo_repo import AnimalRepository
-from services.query_service import build_rescue_query, validate_filter_type
-from services.ranking_service import criteria_for_filter, rank_results
+from services.query_service import build_rescue_query, get_rescue, validate_filter_type
+from services.ranking_service import build_score_stages
 from services.result_service import sanitize_rows
 
 logger = logging.getLogger("grazioso.app")
 
+# score_breakdown is a nested dict per row; only ship it when debugging scores.
+DEBUG_SCORES = os.getenv("GRAZIOSO_DEBUG_SCORES") == "1"
+
+# Fields the DataTable, map and ranker actually consume; everything else stays in Mongo.
+UI_FIELDS = {
+    "breed": 1,
+    "sex_upon_outcome": 1,
+    "age_upon_outcome_in_weeks": 1,
+    "name": 1,
+    "location_lat": 1,
+    "location_long": 1,
+    "animal_id": 1,
+    "outcome_type": 1,
+    "date_of_birth": 1,
+    "color": 1,
+    "_id": 0,
+}
+
+# Columns users may sort on. The repository appends an _id tie-breaker, so a
+# single-column sort on any of these but match_score walks its {field, _id}
+# index (SORT_INDEXES in mongo_repo) before scoring. Multi-column sorts and
+# match_score, which is computed in the pipeline and is the default ranking
+# sort, are an in-memory top-k $sort (skip + page size). Other columns show
+# no sort control (NO_SORT_CSS), so a click is never silently ignored.
+SORTABLE = {"breed", "sex_upon_outcome", "age_upon_outcome_in_weeks", "name", "animal_id", "match_score"}
+
+# Row keys are fixed by UI_FIELDS plus the computed score, so columns are static.
+COLUMNS = [
+    {"name": c, "id": c, "deletable": False, "selectable": True}
+    for c in (*(f for f, keep in UI_FIELDS.items() if keep), "match_score")
+]
+
+NO_SORT_CSS = [
+    {"selector": f'th[data-dash-column="{c["id"]}"] .column-header--sort', "rule": "display: none"}
+    for c in COLUMNS if c["id"] not in SORTABLE
+]
+
 configure_logging()
 
 repo = AnimalRepository()
+# With a URI configured, use a client with a bounded pool and short timeouts
+# (CLIENT_OPTIONS) so an outage fails callbacks fast instead of after 30 s.
+if os.getenv("GRAZIOSO_MONGO_URI"):
+    repo.connect(os.environ["GRAZIOSO_MONGO_URI"])
 repo.ensure_indexes()
 
 app = JupyterDash(__name__)
 
+# Aggregation results are shared across callbacks/clients for a short TTL.
+cache = Cache(app.server, config={"CACHE_TYPE": "SimpleCache", "CACHE_DEFAULT_TIMEOUT": 60})
+
+# Served as a static, browser-cacheable file from assets/ instead of an inline data URI.
 image_filename = "Grazioso Salvare Logo.png"
-encoded_image = ""
-if os.path.exists(image_filename):
-    encoded_image = base64.b64encode(open(image_filename, "rb").read()).decode()
+has_logo = os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", image_filename))
 
 app.layout = html.Div([
     html.Center(html.Img(
-        src=f"data:image/png;base64,{encoded_image}" if encoded_image else None,
-        style={"width": "200px", "display": "block"} if encoded_image else {"display": "none"},
+        src=app.get_asset_url(image_filename) if has_logo else None,
+        style={"width": "200px", "display": "block"} if has_logo else {"display": "none"},
     )),
     html.Center(html.B(html.H1("SNHU CS-340 Dashboard"))),
     html.H1("Project Two - Daniel Beale", style={"textAlign": "center", "color": "#2c3e50"}),
@@ -60,13 +102,14 @@ app.layout = html.Div([
 
     dash_table.DataTable(
         id="datatable-id",
-        columns=[],
+        columns=COLUMNS,
         data=[],
         editable=False,
         filter_action="none",
         sort_action="custom",
         sort_mode="multi",
         sort_by=[],
+        css=NO_SORT_CSS,
         page_action="custom",
         page_current=0,
         page_size=10,
@@ -93,7 +136,6 @@ app.layout = html.Div([
 
 @app.callback(
     Output("datatable-id", "data"),
-    Output("datatable-id", "columns"),
     Input("filter-type", "value"),
     Input("datatable-id", "page_current"),
     Input("datatable-id", "page_size"),
@@ -102,50 +144,48 @@ app.layout = html.Div([
 def update_table(filter_type, page_current, page_size, sort_by):
     """
     Server-side pagination and sorting using MongoDB skip/limit and sort.
-    Algorithmic enhancement: compute match_score and rank results.
+    Algorithmic enhancement: match_score is computed and ranked inside the
+    aggregation pipeline, so Mongo returns an already-ranked page.
     Predictable failure behavior: empty output on invalid input / DB errors.
     """
     try:
-        validate_filter_type(filter_type)
+        query, criteria = get_rescue(filter_type)
     except ValueError:
         logger.warning("Invalid filter type received: %s", filter_type)
-        return [], []
+        return []
 
     if not repo.ping():
         logger.error("Database unavailable for query")
-        return [], []
+        return []
 
-    query = build_rescue_query(filter_type)
-    criteria = criteria_for_filter(filter_type)
-
-    # Mongo sort is ONLY for real DB fields. match_score is computed after retrieval.
-    mongo_sort = None
-    if sort_by:
-        mongo_sort = [(s["column_id"], 1 if s["direction"] == "asc" else -1) for s in sort_by]
+    # match_score is computed in the pipeline, so it can be sorted like a DB field.
+    # Only SORTABLE columns offer a sort control; the filter guards stale sort_by.
+    mongo_sort = [
+        (s["column_id"], -1 if s["direction"] == "desc" else 1)
+        for s in (sort_by or []) if s["column_id"] in SORTABLE
+    ]
+    if not mongo_sort and filter_type != "all":
+        # Default ordering: highest score first ("all" has nothing to rank by)
+        mongo_sort = [("match_score", -1)]
 
     # Pagination
     page_current = page_current or 0
     page_size = page_size or 10
     skip = page_current * page_size
 
-    # Read page slice
-    rows = repo.read(query, sort=mongo_sort, skip=skip, limit=page_size)
-    rows = sanitize_rows(rows)
-
-    if not rows:
-        return [], []
-
-    # Rank page results (adds match_score)
-    ranked = rank_results(rows, criteria)
-
-    # Default ordering: highest score first. If user chose sorts, keep their order by not overriding.
-    if not sort_by:
-        ranked = sorted(ranked, key=lambda r: r.get("match_score", 0), reverse=True)
+    # Read ranked page slice (adds match_score)
+    ranked = repo.aggregate_ranked(
+        query, build_score_stages(criteria, include_breakdown=DEBUG_SCORES),
+        sort=mongo_sort, skip=skip, limit=page_size, projection=UI_FIELDS,
+    )
+    ranked = sanitize_rows(ranked)
 
-    cols = [{"name": c, "id": c, "deletable": False, "selectable": True} for c in ranked[0].keys()]
+    if not ranked:
+        return []
 
+    # Rows arrive in final order from the pipeline's $sort; no re-sort here.
     logger.info("update_table ok filter=%s page=%d results=%d", filter_type, page_current, len(ranked))
-    return ranked, cols
+    return ranked
 
 
 @app.callback(
@@ -157,6 +197,39 @@ def update_styles(selected_columns):
     return [{"if": {"column_id": i}, "background_color": "#D2F3FF"} for i in selected_columns]
 
 
+@cache.memoize(timeout=60)
+def get_breed_figure(filter_type):
+    """Breed-count bar chart as plain figure JSON for a validated filter (memoized;
+    hits skip both Mongo and the Plotly figure build). None when there is no data."""
+    counts = repo.aggregate_breed_counts(build_rescue_query(filter_type))
+    if not counts:
+        return None
+
+    fig = px.bar(
+        counts,
+        x="breed",
+        y="count",
+        title="Breed Distribution for Selected Rescue Type",
+        labels={"breed": "Breed", "count": "Number of Dogs"},
+    )
+    fig.update_layout(xaxis={"categoryorder": "total descending"})
+    return fig.to_plotly_json()
+
+
+@cache.memoize(timeout=60)
+def get_sex_counts(filter_type):
+    """Sex counts for a validated filter (memoized). None when empty or failed,
+    so the miss is retried instead of cached."""
+    return repo.aggregate_sex_counts(build_rescue_query(filter_type)) or None
+
+
+@cache.memoize(timeout=60)
+def get_age_summary(filter_type):
+    """Age min/max/avg for a validated filter (memoized). None when empty or
+    failed, so the miss is retried instead of cached."""
+    return repo.aggregate_age_summary(build_rescue_query(filter_type)) or None
+
+
 @app.callback(
     Output("graph-id", "children"),
     Input("filter-type", "value"),
@@ -173,21 +246,12 @@ def update_graph(filter_type):
     if not repo.ping():
         return [html.H5("Database unavailable.")]
 
-    query = build_rescue_query(filter_type)
-    counts = repo.aggregate_breed_counts(query)
+    figure = get_breed_figure(filter_type)
 
-    if not counts:
+    if not figure:
         return [html.H5("No data available for this filter.")]
 
-    fig = px.bar(
-        counts,
-        x="breed",
-        y="count",
-        title="Breed Distribution for Selected Rescue Type",
-        labels={"breed": "Breed", "count": "Number of Dogs"},
-    )
-    fig.update_layout(xaxis={"categoryorder": "total descending"})
-    return [dcc.Graph(figure=fig)]
+    return [dcc.Graph(figure=figure)]
 
 
 @app.callback(
@@ -206,10 +270,8 @@ def update_summary(filter_type):
     if not repo.ping():
         return html.P("Database unavailable.")
 
-    query = build_rescue_query(filter_type)
-
-    sex_counts = repo.aggregate_sex_counts(query) if hasattr(repo, "aggregate_sex_counts") else []
-    age_summary = repo.aggregate_age_summary(query) if hasattr(repo, "aggregate_age_summary") else []
+    sex_counts = get_sex_counts(filter_type)
+    age_summary = get_age_summary(filter_type)
 
     parts = []
     if sex_counts:
@@ -239,34 +301,22 @@ def update_map(viewData, selected_rows):
     Update map to show location of selected dog record.
     Includes predictable behavior if location fields are missing/malformed.
     """
-    dff = pd.DataFrame(viewData) if viewData else pd.DataFrame()
-    if dff.empty:
+    # Only two floats and two strings from one row are needed, so read the
+    # record dict directly instead of building a DataFrame.
+    if not viewData:
         return [html.H5("No location data to display.")]
 
     row = (selected_rows[0] if selected_rows else 0)
-    row = min(max(row, 0), len(dff) - 1)
-
-    # Prefer named columns if present; fallback to original positional indexing.
-    lat = None
-    lon = None
-
-    if "location_lat" in dff.columns and "location_long" in dff.columns:
-        try:
-            lat = float(dff.loc[dff.index[row], "location_lat"])
-            lon = float(dff.loc[dff.index[row], "location_long"])
-        except Exception:
-            lat = None
-            lon = None
-
-    if lat is None or lon is None:
-        try:
-            lat = float(dff.iloc[row, 13])
-            lon = float(dff.iloc[row, 14])
-        except Exception:
-            return [html.H5("Location fields unavailable for selected record.")]
-
-    tooltip = str(dff.iloc[row, 4]) if dff.shape[1] > 4 else "Selected"
-    popup_text = str(dff.iloc[row, 9]) if dff.shape[1] > 9 else ""
+    rec = viewData[min(max(row, 0), len(viewData) - 1)]
+
+    try:
+        lat = float(rec.get("location_lat"))
+        lon = float(rec.get("location_long"))
+    except (TypeError, ValueError):
+        return [html.H5("Location fields unavailable for selected record.")]
+
+    tooltip = str(rec.get("breed") or "Selected")
+    popup_text = str(rec.get("name", ""))
 
     return [
         dl.Map(
@@ -48,8 +48,48 @@ db.animals.createIndex(
   { name: "idx_rescue_filter" }
 );
 
+// Group keys for the breed / sex summary aggregations.
+db.animals.createIndex(
+  { breed: 1 },
+  { name: "idx_breed" }
+);
+
+db.animals.createIndex(
+  { sex_upon_outcome: 1 },
+  { name: "idx_sex" }
+);
+
 // If you commonly sort by age, this supports that.
 db.animals.createIndex(
   { age_upon_outcome_in_weeks: 1 },
   { name: "idx_age" }
 );
+
+// Sortable DataTable columns (SORTABLE in app.py). The repository appends an
+// _id tie-breaker to every sort (and read_after seeks on <key> + _id), so
+// each column needs a { <field>: 1, _id: 1 } index; a single-field index
+// cannot serve that sort. Names match SORT_INDEXES in mongo_repo.py.
+db.animals.createIndex(
+  { breed: 1, _id: 1 },
+  { name: "idx_breed_keyset" }
+);
+
+db.animals.createIndex(
+  { sex_upon_outcome: 1, _id: 1 },
+  { name: "idx_sex_keyset" }
+);
+
+db.animals.createIndex(
+  { age_upon_outcome_in_weeks: 1, _id: 1 },
+  { name: "idx_age_keyset" }
+);
+
+db.animals.createIndex(
+  { name: 1, _id: 1 },
+  { name: "idx_name_keyset" }
+);
+
+db.animals.createIndex(
+  { animal_id: 1, _id: 1 },
+  { name: "idx_animal_id_keyset" }
+);
@@ -1,12 +1,72 @@
+import json
+import math
+import threading
+import time
+from array import array
+from collections.abc import Mapping
+
+from bson.raw_bson import RawBSONDocument
+import pymongo
+from pymongo import MongoClient
+
+PING_TTL_SECONDS = 2.0
+PING_MAX_TIME_MS = 500
+# Client settings used by connect(): warm bounded pool, and health checks /
+# queries fail within about a second instead of the 30 s server-selection default.
+CLIENT_OPTIONS = {
+    "maxPoolSize": 20,
+    "minPoolSize": 5,
+    "maxIdleTimeMS": 60000,
+    "serverSelectionTimeoutMS": 500,
+    "connectTimeoutMS": 1000,
+    "socketTimeoutMS": 2000,
+}
+COUNT_TTL_SECONDS = 5.0
+COUNT_CACHE_MAX = 128  # distinct query shapes kept before the cache is reset
+BREED_COUNT_LIMIT = 100  # top breeds shown by the chart
+# List views only need the rescue-filter fields, which idx_rescue_filter covers,
+# so default reads can be answered from the index without fetching documents.
+DEFAULT_LIST_PROJECTION = {"_id": 0, "breed": 1, "sex_upon_outcome": 1, "age_upon_outcome_in_weeks": 1}
+NUMERIC_FIELDS = frozenset({"age_upon_outcome_in_weeks", "location_lat", "location_long"})
+ITER_BATCH_SIZE = 100  # docs buffered per round trip when streaming
+AGG_MAX_TIME_MS = 2000  # chart aggregations fail fast instead of stalling a callback
+RESCUE_FILTER_FIELDS = ("breed", "sex_upon_outcome", "age_upon_outcome_in_weeks")  # idx_rescue_filter keys
+# Sortable table columns -> {field: 1, _id: 1} index names, matching the _id
+# tie-breaker that aggregate_ranked and read_after append to every sort.
+SORT_INDEXES = {
+    "breed": "idx_breed_keyset",
+    "sex_upon_outcome": "idx_sex_keyset",
+    "age_upon_outcome_in_weeks": "idx_age_keyset",
+    "name": "idx_name_keyset",
+    "animal_id": "idx_animal_id_keyset",
+}
+
 def aggregate_breed_counts(self, match_query: dict) -> list[dict]:
+    # Only breed is read after $match, so a hinted index can answer the group
+    # from index entries instead of fetching whole documents. The compound
+    # index is only hinted when its breed prefix is filtered on; sex- or
+    # age-only queries are left to the planner (idx_sex / idx_age).
+    if not match_query:
+        hint = "idx_breed"
+    elif "breed" in match_query and set(match_query) <= set(RESCUE_FILTER_FIELDS):
+        hint = "idx_rescue_filter"
+    else:
+        hint = None
     pipeline = [
         {"$match": match_query},
+        # Only breed flows into $group; dropping _id keeps the index scan covered
+        {"$project": {"_id": 0, "breed": 1}},
         {"$group": {"_id": "$breed", "count": {"$sum": 1}}},
         {"$sort": {"count": -1}},
+        {"$limit": BREED_COUNT_LIMIT},
         {"$project": {"breed": "$_id", "count": 1, "_id": 0}},
     ]
     try:
-        return list(self.collection.aggregate(pipeline))
+        # Bounded result fits one batch; fail fast rather than spill the sort to disk
+        options = {"batchSize": BREED_COUNT_LIMIT, "allowDiskUse": False, "maxTimeMS": AGG_MAX_TIME_MS}
+        if hint:
+            options["hint"] = hint
+        return list(self.collection.aggregate(pipeline, **options))
     except PyMongoError as e:
         logger.exception("aggregate_breed_counts failed: %s", e)
         return []
@@ -41,3 +101,383 @@ def aggregate_age_summary(self, match_query: dict) -> list[dict]:
     except PyMongoError as e:
         logger.exception("aggregate_age_summary failed: %s", e)
         return []
+
+def aggregate_ranked(self, match_query: dict, score_stages: list[dict], sort=None,
+                     skip: int = 0, limit: int = 10, projection: dict | None = None) -> list[dict]:
+    narrow = []
+    if projection:
+        # Narrow documents before scoring; _id is kept for the sort tie-breaker
+        # and dropped by the final $project.
+        narrow.append({"$project": {k: v for k, v in projection.items() if k != "_id"}})
+
+    sort_spec = dict(sort or [])
+    paging = []
+    if sort_spec:
+        # _id tie-breaker keeps skip/limit pages deterministic across equal keys.
+        # It follows the last key's direction, so a single-column sort walks its
+        # {field: 1, _id: 1} index (SORT_INDEXES) forwards or backwards.
+        sort_spec.setdefault("_id", list(sort_spec.values())[-1])
+        paging.append({"$sort": sort_spec})
+    paging.append({"$skip": max(int(skip), 0)})
+    paging.append({"$limit": max(1, min(int(limit), 500))})
+
+    if "match_score" in sort_spec:
+        pipeline = [{"$match": match_query}, *narrow, *score_stages, *paging]
+    else:
+        # Ordering does not depend on the score: $sort directly after $match can
+        # use an index, and only the returned page is projected and scored.
+        pipeline = [{"$match": match_query}, *paging, *narrow, *score_stages]
+    pipeline.append({"$project": {"_id": 0}})
+
+    try:
+        return list(self.collection.aggregate(pipeline))
+    except PyMongoError as e:
+        logger.exception("aggregate_ranked failed: %s", e)
+        return []
+
+def read(self, query: dict, sort=None, skip: int = 0, limit: int = 10,
+         projection: dict | None = None, full: bool = False) -> list[dict]:
+    # Any mapping is accepted so pre-encoded RawBSONDocument filters pass through.
+    if not isinstance(query, Mapping):
+        raise ValueError("query must be a dict")
+
+    limit = max(1, min(int(limit), 500))
+    try:
+        # batch_size == limit: the first reply carries the whole page and the
+        # server exhausts the cursor with it (cursor id 0), so there is no
+        # getMore or killCursors round trip; the same effect as singleBatch.
+        if not projection:
+            projection = {"_id": 0} if full else DEFAULT_LIST_PROJECTION
+        cursor = self.collection.find(query, projection=projection, batch_size=limit)
+        if sort:
+            cursor = cursor.sort(sort)
+        return list(cursor.skip(max(int(skip), 0)).limit(limit))
+    except Exception as e:
+        logger.exception("read failed: %s", e)
+        return []
+
+def _iter_cursor(collection, query, sort, limit, projection, batch_size):
+    cursor = None
+    try:
+        cursor = collection.find(query, projection=projection, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        yield from cursor
+    except PyMongoError as e:
+        # Re-raised so a stream cut short is never mistaken for a complete one.
+        logger.exception("iter_read failed: %s", e)
+        raise
+    finally:
+        # Also runs when the consumer stops early, releasing the server cursor.
+        if cursor is not None:
+            cursor.close()
+
+def iter_read(self, query: dict, sort=None, limit: int = 0, projection: dict | None = None,
+              batch_size: int = ITER_BATCH_SIZE):
+    # Streams docs one at a time for exports/analytics: only one batch is
+    # held in memory instead of the whole result list. limit=0 means no limit.
+    if not isinstance(query, Mapping):
+        raise ValueError("query must be a dict")
+    return _iter_cursor(self.collection, query, sort, max(int(limit), 0),
+                        projection or {"_id": 0}, max(int(batch_size), 1))
+
+def read_columnar(self, query: dict, fields: list[str], sort=None, limit: int = 0) -> dict:
+    # Struct-of-arrays result: one list per field instead of one dict per doc.
+    # Numeric fields become array('d') (missing/non-numeric -> NaN) so they can
+    # be handed to numpy without a per-row conversion.
+    if not isinstance(query, Mapping):
+        raise ValueError("query must be a dict")
+
+    # A repeated field would append to the same column twice per doc.
+    fields = list(dict.fromkeys(fields))
+    numeric = [f for f in fields if f in NUMERIC_FIELDS]
+    other = [f for f in fields if f not in NUMERIC_FIELDS]
+    columns = {f: array("d") if f in NUMERIC_FIELDS else [] for f in fields}
+    projection = {f: 1 for f in fields}
+    projection["_id"] = 0
+    try:
+        cursor = self.collection.find(query, projection=projection, batch_size=ITER_BATCH_SIZE)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(max(int(limit), 0))
+        for doc in cursor:
+            for f in other:
+                columns[f].append(doc.get(f))
+            for f in numeric:
+                value = doc.get(f)
+                columns[f].append(value if type(value) in (int, float) else math.nan)
+    except PyMongoError as e:
+        logger.exception("read_columnar failed: %s", e)
+        return {f: array("d") if f in NUMERIC_FIELDS else [] for f in fields}
+    return columns
+
+def find_raw(self, filter_bytes: bytes, sort=None, skip: int = 0, limit: int = 10,
+             projection: dict | None = None, full: bool = False) -> list[dict]:
+    # Filter is already BSON (e.g. build_rescue_query_bson); the driver copies
+    # the bytes into the find command instead of re-encoding a dict.
+    return self.read(RawBSONDocument(filter_bytes), sort=sort, skip=skip, limit=limit,
+                     projection=projection, full=full)
+
+def read_page_with_count(self, query: dict, sort=None, skip: int = 0, limit: int = 10,
+                         projection: dict | None = None) -> tuple[list[dict], int]:
+    # Page slice and total in one round trip. $match runs once (and can use an
+    # index); both facets consume its output.
+    if not isinstance(query, Mapping):
+        raise ValueError("query must be a dict")
+
+    page = []
+    if sort:
+        page.append({"$sort": dict(sort)})
+    page.append({"$skip": max(int(skip), 0)})
+    page.append({"$limit": max(1, min(int(limit), 500))})
+    page.append({"$project": projection or {"_id": 0}})
+
+    pipeline = [
+        {"$match": query},
+        {"$facet": {"data": page, "total": [{"$count": "n"}]}},
+    ]
+    try:
+        result = next(iter(self.collection.aggregate(pipeline)), None)
+    except PyMongoError as e:
+        logger.exception("read_page_with_count failed: %s", e)
+        return [], 0
+
+    if not result:
+        return [], 0
+    total = result.get("total") or [{}]
+    return result.get("data", []), int(total[0].get("n", 0))
+
+def read_scored(self, match_query: dict, score_stages: list[dict], limit: int = 10,
+                projection: dict | None = None) -> list[dict]:
+    # Top-N by match_score, scored and sorted by the server; only `limit` docs
+    # cross the wire. score_stages come from ranking_service.build_score_stages.
+    return self.aggregate_ranked(match_query, score_stages, sort=[("match_score", -1)],
+                                 limit=limit, projection=projection)
+
+def _coalesce_key(queries: list[dict]) -> str | None:
+    # The single key whose scalar value differs between otherwise identical
+    # queries, or None when the queries cannot be merged into one $in.
+    first = queries[0]
+    if any(q.keys() != first.keys() for q in queries):
+        return None
+    differing = [k for k in first if any(q[k] != first[k] for q in queries)]
+    if len(differing) != 1:
+        return None
+    key = differing[0]
+    # Dotted keys cannot be routed back with doc.get(key), and bools would
+    # collapse onto 1/0 in the routing dict although Mongo keeps them apart.
+    if key.startswith("$") or "." in key:
+        return None
+    if not all(isinstance(q[key], (str, int, float)) and not isinstance(q[key], bool) for q in queries):
+        return None
+    return key
+
+def read_batched(self, queries: list[dict], projection: dict | None = None) -> list[list[dict]]:
+    # Point lookups that differ only in one scalar field (e.g. several
+    # animal_ids) are served by one {key: {$in: [...]}} find and split back
+    # per query; anything else falls back to one find per query.
+    if not all(isinstance(q, Mapping) for q in queries):
+        raise ValueError("queries must be dicts")
+    if not queries:
+        return []
+
+    projection = dict(projection or {"_id": 0})
+    key = _coalesce_key(queries) if len(queries) > 1 else None
+    try:
+        if key is None:
+            return [list(self.collection.find(q, projection=projection)) for q in queries]
+
+        # The merge key is needed to route each doc back to its query.
+        if any(v for k, v in projection.items() if k != "_id"):
+            hide_key = not projection.get(key)
+            projection[key] = 1
+        else:
+            hide_key = projection.pop(key, 1) == 0
+
+        values = list(dict.fromkeys(q[key] for q in queries))
+        merged = {**queries[0], key: {"$in": values}}
+        by_value = {v: [] for v in values}
+        for doc in self.collection.find(merged, projection=projection):
+            value = doc.pop(key, None) if hide_key else doc.get(key)
+            # An array field matches $in on any element, so route by element;
+            # unhashable values (embedded docs, nested arrays) match no query.
+            for v in value if isinstance(value, list) else (value,):
+                try:
+                    bucket = by_value.get(v)
+                except TypeError:
+                    continue
+                if bucket is not None and (not bucket or bucket[-1] is not doc):
+                    bucket.append(doc)
+    except PyMongoError as e:
+        logger.exception("read_batched failed: %s", e)
+        return [[] for _ in queries]
+
+    # Copies per query, so queries sharing a value never share dict objects.
+    return [[dict(doc) for doc in by_value[q[key]]] for q in queries]
+
+def _keyset_predicate(sort_spec: dict, after: dict) -> dict:
+    # Rows strictly after `after` in sort order: for each key, the earlier keys
+    # tie and this one moves past it ($gt ascending, $lt descending).
+    # Null/missing values sort lowest, and $gt/$lt never match across types,
+    # so null is handled explicitly: ascending from null moves to any non-null
+    # value, descending from null has nothing past it on this key, and
+    # descending from a value also reaches the null rows after it.
+    branches = []
+    ties = {}
+    for key, direction in sort_spec.items():
+        value = after.get(key)
+        if value is None:
+            if direction == 1:
+                branches.append({**ties, key: {"$ne": None}})
+        elif direction == 1:
+            branches.append({**ties, key: {"$gt": value}})
+        elif key == "_id":  # never null
+            branches.append({**ties, key: {"$lt": value}})
+        else:
+            branches.append({**ties, "$or": [{key: {"$lt": value}}, {key: None}]})
+        ties[key] = value
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+def read_after(self, query: dict, sort=None, limit: int = 10, after: dict | None = None,
+               projection: dict | None = None) -> tuple[list[dict], dict | None]:
+    # Keyset pagination: the next page starts from a range predicate on the sort
+    # keys (+ _id tie-breaker) instead of cursor.skip(), which walks every
+    # preceding index entry. Pair each sort with a {<keys>: 1, _id: 1} index.
+    if not isinstance(query, Mapping):
+        raise ValueError("query must be a dict")
+
+    sort_spec = dict(sort or [])
+    # Same tie-breaker rule as aggregate_ranked, so SORT_INDEXES serve both.
+    sort_spec.setdefault("_id", list(sort_spec.values())[-1] if sort_spec else 1)
+    limit = max(1, min(int(limit), 500))
+
+    if after:
+        predicate = _keyset_predicate(sort_spec, after)
+        query = {"$and": [query, predicate]} if query else predicate
+
+    # The token needs the sort keys and _id even when the caller hides them.
+    keep_id = bool(projection) and projection.get("_id", 1) != 0
+    if projection:
+        projection = {k: v for k, v in projection.items() if k != "_id"}
+        if any(projection.values()):
+            projection.update({k: 1 for k in sort_spec if k != "_id"})
+    projection = projection or None
+
+    try:
+        cursor = self.collection.find(query, projection=projection, batch_size=limit)
+        docs = list(cursor.sort(list(sort_spec.items())).limit(limit))
+    except PyMongoError as e:
+        logger.exception("read_after failed: %s", e)
+        return [], None
+
+    next_after = None
+    if len(docs) == limit:
+        next_after = {k: docs[-1].get(k) for k in sort_spec}
+    if not keep_id:
+        for doc in docs:
+            doc.pop("_id", None)
+    return docs, next_after
+
+def count_documents(self, query: dict, cap: int | None = None) -> int:
+    # With a cap the server stops counting once `cap` matches are seen, so the
+    # cost is bounded by the cap rather than the match cardinality. A result
+    # equal to cap means "cap or more" (e.g. "1000+" in a pager).
+    if not isinstance(query, Mapping):
+        logger.warning("count_documents called with non-dict query")
+        return 0
+
+    options = {}
+    if cap is not None:
+        options["limit"] = max(int(cap), 1)
+
+    # Pagers re-issue the same count on every page change; serve repeats of
+    # the same query shape from memory for a few seconds.
+    cache = self.__dict__.setdefault("_count_cache", {})
+    if isinstance(query, RawBSONDocument):
+        shape = query.raw  # prebuilt rescue queries: already canonical bytes
+    else:
+        shape = json.dumps(query, sort_keys=True, default=str)
+    key = (shape, options.get("limit"))
+    now = time.monotonic()
+    hit = cache.get(key)
+    if hit is not None and now - hit[1] < COUNT_TTL_SECONDS:
+        return hit[0]
+
+    try:
+        count = int(self.collection.count_documents(query, **options))
+    except Exception as e:
+        logger.exception("count_documents failed: %s", e)
+        return 0
+
+    if len(cache) >= COUNT_CACHE_MAX:
+        cache.clear()
+    cache[key] = (count, now)
+    return count
+
+def invalidate_counts(self) -> None:
+    # Call after writes so the next count reflects them.
+    self.__dict__.pop("_count_cache", None)
+
+def ping(self) -> bool:
+    # A burst of callbacks from one interaction shares a single admin round trip.
+    cached = getattr(self, "_ping_cache", None)
+    now = time.monotonic()
+    if cached is not None and now - cached[0] < PING_TTL_SECONDS:
+        return cached[1]
+
+    # Concurrent callers on this repository that miss together wait for one
+    # ping instead of each issuing their own; whoever gets the lock second
+    # reuses the fresh result. Other repositories have their own lock.
+    with self.__dict__.setdefault("_ping_lock", threading.Lock()):
+        cached = getattr(self, "_ping_cache", None)
+        if cached is not None and now - cached[0] < PING_TTL_SECONDS:
+            return cached[1]
+
+        try:
+            # pymongo.timeout bounds the whole command, server selection
+            # included (maxTimeMS only bounds server-side execution), so an
+            # outage holds the lock for at most PING_MAX_TIME_MS whatever the
+            # client's serverSelectionTimeoutMS.
+            with pymongo.timeout(PING_MAX_TIME_MS / 1000):
+                self.client.admin.command("ping")
+            alive = True
+        except Exception as e:
+            logger.warning("ping failed: %s", e)
+            alive = False
+
+        self._ping_cache = (now, alive)
+    return alive
+
+def connect(self, uri: str, database: str = "aac", collection: str = "animals") -> None:
+    # (Re)binds the repository to a client built with CLIENT_OPTIONS. Names
+    # default to the ones db_setup.js configures.
+    previous = getattr(self, "client", None)
+    self.client = MongoClient(uri, **CLIENT_OPTIONS)
+    self.collection = self.client[database][collection]
+    # Health and counts cached for the old client no longer apply.
+    self.__dict__.pop("_ping_cache", None)
+    self.invalidate_counts()
+    if previous is not None:
+        previous.close()
+
+def ensure_indexes(self) -> None:
+    # Names match db_setup.js so either path can create them without conflict.
+    try:
+        # Rescue filters: equality on breed/sex + range on age -> bounded IXSCAN
+        self.collection.create_index(
+            [(field, 1) for field in RESCUE_FILTER_FIELDS],
+            name="idx_rescue_filter",
+        )
+        # $group keys for the summary aggregations
+        self.collection.create_index([("breed", 1)], name="idx_breed")
+        self.collection.create_index([("sex_upon_outcome", 1)], name="idx_sex")
+        self.collection.create_index([("age_upon_outcome_in_weeks", 1)], name="idx_age")
+        # Sortable table columns: sorts always end in an _id tie-breaker, which
+        # only a compound index can serve without a blocking SORT stage.
+        for field, name in SORT_INDEXES.items():
+            self.collection.create_index([(field, 1), ("_id", 1)], name=name)
+    except PyMongoError as e:
+        logger.exception("ensure_indexes failed: %s", e)
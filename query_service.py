@@ -5,7 +5,47 @@ Provides validation and query construction for rescue dog filtering.
 All queries are built server-side to ensure consistency and security.
 """
 
-ALLOWED_FILTERS = {"all", "water", "mountain", "disaster"}
+from types import MappingProxyType
+from typing import Any, Mapping
+
+import bson
+from bson.raw_bson import RawBSONDocument
+
+from services.ranking_service import MatchCriteria, criteria_for_filter
+
+ALLOWED_FILTERS = frozenset({"all", "water", "mountain", "disaster"})
+
+# Rescue queries for the fixed filter domain, built once at import.
+# Conditions are top-level keys (implicitly AND-ed) so the planner can use
+# the idx_rescue_filter compound index directly.
+_PREBUILT: Mapping[str, dict[str, Any]] = MappingProxyType({
+    "water": {
+        "breed": {"$in": ["Labrador Retriever Mix", "Chesapeake Bay Retriever", "Newfoundland"]},
+        "sex_upon_outcome": "Intact Female",
+        "age_upon_outcome_in_weeks": {"$gte": 26, "$lte": 156},
+    },
+    "mountain": {
+        "breed": {"$in": ["German Shepherd", "Alaskan Malamute", "Old English Sheepdog", "Siberian Husky", "Rottweiler"]},
+        "sex_upon_outcome": "Intact Male",
+        "age_upon_outcome_in_weeks": {"$gte": 26, "$lte": 156},
+    },
+    "disaster": {
+        "breed": {"$in": ["Doberman Pinscher", "German Shepherd", "Golden Retriever", "Bloodhound", "Rottweiler"]},
+        "sex_upon_outcome": "Intact Male",
+        "age_upon_outcome_in_weeks": {"$gte": 20, "$lte": 300},
+    },
+    "all": {},
+})
+
+# BSON encoding of each prebuilt query, and a shared RawBSONDocument view of
+# it: pymongo copies a RawBSONDocument's bytes straight into the command, so
+# the filter is never re-encoded per request.
+_ENCODED: Mapping[str, bytes] = MappingProxyType({
+    kind: bson.encode(query) for kind, query in _PREBUILT.items()
+})
+_PREBUILT_RAW: Mapping[str, RawBSONDocument] = MappingProxyType({
+    kind: RawBSONDocument(encoded) for kind, encoded in _ENCODED.items()
+})
 
 
 def validate_filter_type(filter_type: str) -> str:
@@ -13,7 +53,8 @@ def validate_filter_type(filter_type: str) -> str:
     Validate that filter_type is in the allowed set.
     
     Uses whitelist validation to prevent invalid filters from reaching
-    the database layer.
+    the database layer. Matching is exact (no case folding or stripping),
+    and non-string input is rejected rather than raising TypeError.
     
     Args:
         filter_type: The filter type to validate
@@ -33,12 +74,12 @@ def validate_filter_type(filter_type: str) -> str:
             ...
         ValueError: Invalid filter type.
     """
-    if filter_type not in ALLOWED_FILTERS:
+    if not isinstance(filter_type, str) or filter_type not in ALLOWED_FILTERS:
         raise ValueError("Invalid filter type.")
     return filter_type
 
 
-def build_rescue_query(filter_type: str) -> dict:
+def build_rescue_query(filter_type: str) -> RawBSONDocument:
     """
     Build MongoDB query for rescue dog filtering based on rescue type.
     
@@ -67,7 +108,11 @@ def build_rescue_query(filter_type: str) -> dict:
         filter_type: One of {'all', 'water', 'mountain', 'disaster'}
     
     Returns:
-        MongoDB query dict that can be passed to collection.find()
+        MongoDB query that can be passed to collection.find(), as a
+        read-only RawBSONDocument encoded once at import and shared between
+        calls. Conditions are top-level keys (implicitly AND-ed) so the
+        planner can use the idx_rescue_filter compound index directly.
+        Use dict(query) for a plain, mutable copy.
     
     Raises:
         ValueError: If filter_type is invalid
@@ -78,36 +123,71 @@ def build_rescue_query(filter_type: str) -> dict:
         ['Labrador Retriever Mix', 'Chesapeake Bay Retriever', 'Newfoundland']
         
         >>> query = build_rescue_query("all")
-        >>> query
+        >>> dict(query)
         {}
     """
     validate_filter_type(filter_type)
+    return _PREBUILT_RAW[filter_type]
 
-    if filter_type == "water":
-        return {
-            "$and": [
-                {"breed": {"$in": ["Labrador Retriever Mix", "Chesapeake Bay Retriever", "Newfoundland"]}},
-                {"sex_upon_outcome": "Intact Female"},
-                {"age_upon_outcome_in_weeks": {"$gte": 26, "$lte": 156}},
-            ]
-        }
-
-    if filter_type == "mountain":
-        return {
-            "$and": [
-                {"breed": {"$in": ["German Shepherd", "Alaskan Malamute", "Old English Sheepdog", "Siberian Husky", "Rottweiler"]}},
-                {"sex_upon_outcome": "Intact Male"},
-                {"age_upon_outcome_in_weeks": {"$gte": 26, "$lte": 156}},
-            ]
-        }
-
-    if filter_type == "disaster":
-        return {
-            "$and": [
-                {"breed": {"$in": ["Doberman Pinscher", "German Shepherd", "Golden Retriever", "Bloodhound", "Rottweiler"]}},
-                {"sex_upon_outcome": "Intact Male"},
-                {"age_upon_outcome_in_weeks": {"$gte": 20, "$lte": 300}},
-            ]
-        }
-
-    return {}
+
+def build_rescue_query_bson(filter_type: str) -> bytes:
+    """
+    Return the rescue query for filter_type as pre-encoded BSON bytes.
+    
+    The bytes are encoded once at import, so callers that pass them to the
+    driver wrapped in a RawBSONDocument (see AnimalRepository.find_raw)
+    skip per-request BSON serialization of the filter.
+    
+    Args:
+        filter_type: One of {'all', 'water', 'mountain', 'disaster'}
+    
+    Returns:
+        BSON document bytes equal to bson.encode(build_rescue_query(filter_type))
+    
+    Raises:
+        ValueError: If filter_type is invalid
+    
+    Examples:
+        >>> bson.decode(build_rescue_query_bson("water"))["sex_upon_outcome"]
+        'Intact Female'
+    """
+    validate_filter_type(filter_type)
+    return _ENCODED[filter_type]
+
+
+# Query and scoring criteria for every filter, built once at import.
+# The filter domain is fixed, so per-request work is a single dict lookup.
+_RESCUE_TABLE: dict[str, tuple[RawBSONDocument, MatchCriteria]] = {
+    kind: (_PREBUILT_RAW[kind], criteria_for_filter(kind))
+    for kind in ALLOWED_FILTERS
+}
+
+
+def get_rescue(filter_type: str) -> tuple[RawBSONDocument, MatchCriteria]:
+    """
+    Validate a filter and return its prebuilt (query, criteria) pair.
+    
+    Combines validate_filter_type, build_rescue_query and criteria_for_filter
+    into one lookup for the request path. The returned query is the same
+    shared RawBSONDocument that build_rescue_query returns.
+    
+    Args:
+        filter_type: One of {'all', 'water', 'mountain', 'disaster'}
+    
+    Returns:
+        Tuple of (MongoDB query as RawBSONDocument, MatchCriteria)
+    
+    Raises:
+        ValueError: If filter_type is not in ALLOWED_FILTERS
+    
+    Examples:
+        >>> query, criteria = get_rescue("water")
+        >>> query["sex_upon_outcome"]
+        'Intact Female'
+        >>> criteria.min_weeks
+        26
+    """
+    try:
+        return _RESCUE_TABLE[filter_type]
+    except (KeyError, TypeError):
+        raise ValueError("Invalid filter type.") from None
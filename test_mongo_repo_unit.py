@@ -2,9 +2,14 @@
 Tests for MongoDB repository operations including server-side pagination and sorting.
 """
 
+import math
+
+import bson
 import pytest
+from bson.raw_bson import RawBSONDocument
 from unittest.mock import MagicMock, Mock, patch
 from data.mongo_repo import AnimalRepository
+from _fakes import FakeCursor
 
 
 class TestAnimalRepositoryRead:
@@ -15,10 +20,7 @@ class TestAnimalRepositoryRead:
         repo = AnimalRepository.__new__(AnimalRepository)
         repo.collection = MagicMock()
         
-        mock_cursor = MagicMock()
-        mock_cursor.sort.return_value = mock_cursor
-        mock_cursor.skip.return_value = mock_cursor
-        mock_cursor.limit.return_value = [{"breed": "Lab", "match_score": 100}]
+        mock_cursor = FakeCursor([{"breed": "Lab", "match_score": 100}])
         repo.collection.find.return_value = mock_cursor
         
         result = repo.read({}, limit=10)
@@ -31,10 +33,7 @@ class TestAnimalRepositoryRead:
         repo = AnimalRepository.__new__(AnimalRepository)
         repo.collection = MagicMock()
         
-        mock_cursor = MagicMock()
-        mock_cursor.sort.return_value = mock_cursor
-        mock_cursor.skip.return_value = mock_cursor
-        mock_cursor.limit.return_value = []
+        mock_cursor = FakeCursor()
         repo.collection.find.return_value = mock_cursor
         
         # Call with sort specification
@@ -42,75 +41,63 @@ class TestAnimalRepositoryRead:
         repo.read({}, sort=sort_spec, limit=10)
         
         # Verify sort was called with correct spec
-        mock_cursor.sort.assert_called_with(sort_spec)
+        assert mock_cursor.sort_calls[-1] == sort_spec
     
     def test_read_applies_skip_pagination(self):
         """Skip is applied for pagination."""
         repo = AnimalRepository.__new__(AnimalRepository)
         repo.collection = MagicMock()
         
-        mock_cursor = MagicMock()
-        mock_cursor.sort.return_value = mock_cursor
-        mock_cursor.skip.return_value = mock_cursor
-        mock_cursor.limit.return_value = []
+        mock_cursor = FakeCursor()
         repo.collection.find.return_value = mock_cursor
         
         # Call with skip for page 2 (10 items per page)
         repo.read({}, skip=10, limit=10)
         
         # Verify skip was called with correct value
-        mock_cursor.skip.assert_called_with(10)
+        assert mock_cursor.skip_calls[-1] == 10
     
     def test_read_applies_limit_pagination(self):
         """Limit is applied and capped at 500."""
         repo = AnimalRepository.__new__(AnimalRepository)
         repo.collection = MagicMock()
         
-        mock_cursor = MagicMock()
-        mock_cursor.sort.return_value = mock_cursor
-        mock_cursor.skip.return_value = mock_cursor
-        mock_cursor.limit.return_value = []
+        mock_cursor = FakeCursor()
         repo.collection.find.return_value = mock_cursor
         
         # Call with limit exceeding cap
         repo.read({}, limit=1000)
         
         # Verify limit was capped at 500
-        mock_cursor.limit.assert_called_with(500)
+        assert mock_cursor.limit_calls[-1] == 500
     
     def test_read_caps_limit_at_500(self):
         """Limit cannot exceed 500 for safety."""
         repo = AnimalRepository.__new__(AnimalRepository)
         repo.collection = MagicMock()
         
-        mock_cursor = MagicMock()
-        mock_cursor.sort.return_value = mock_cursor
-        mock_cursor.skip.return_value = mock_cursor
-        mock_cursor.limit.return_value = []
+        mock_cursor = FakeCursor()
         repo.collection.find.return_value = mock_cursor
         
         # Try limit of 1000
         repo.read({}, limit=1000)
         
         # Should be capped at 500
-        mock_cursor.limit.assert_called_with(500)
+        assert mock_cursor.limit_calls[-1] == 500
     
     def test_read_minimum_limit_is_one(self):
         """Limit must be at least 1."""
         repo = AnimalRepository.__new__(AnimalRepository)
         repo.collection = MagicMock()
         
-        mock_cursor = MagicMock()
-        mock_cursor.sort.return_value = mock_cursor
-        mock_cursor.skip.return_value = mock_cursor
-        mock_cursor.limit.return_value = []
+        mock_cursor = FakeCursor()
         repo.collection.find.return_value = mock_cursor
         
         # Try limit of 0
         repo.read({}, limit=0)
         
         # Should be capped at 1 minimum
-        mock_cursor.limit.assert_called_with(1)
+        assert mock_cursor.limit_calls[-1] == 1
     
     def test_read_validates_query_type(self):
         """Read validates that query is a dict."""
@@ -130,20 +117,32 @@ class TestAnimalRepositoryRead:
         assert result == []
     
     def test_read_default_projection_excludes_id(self):
-        """Read uses projection that excludes _id by default."""
+        """Read uses a narrow, index-covered projection that excludes _id by default."""
         repo = AnimalRepository.__new__(AnimalRepository)
         repo.collection = MagicMock()
         
-        mock_cursor = MagicMock()
-        mock_cursor.sort.return_value = mock_cursor
-        mock_cursor.skip.return_value = mock_cursor
-        mock_cursor.limit.return_value = []
+        mock_cursor = FakeCursor()
         repo.collection.find.return_value = mock_cursor
         
         # Call without projection
         repo.read({})
         
         # Verify find was called with projection excluding _id
+        call_args = repo.collection.find.call_args
+        assert call_args[1].get("projection") == {
+            "_id": 0, "breed": 1, "sex_upon_outcome": 1, "age_upon_outcome_in_weeks": 1,
+        }
+    
+    def test_read_full_documents_opt_in(self):
+        """full=True returns whole documents, still without _id."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        
+        mock_cursor = FakeCursor()
+        repo.collection.find.return_value = mock_cursor
+        
+        repo.read({}, full=True)
+        
         call_args = repo.collection.find.call_args
         assert call_args[1].get("projection") == {"_id": 0}
     
@@ -152,10 +151,7 @@ class TestAnimalRepositoryRead:
         repo = AnimalRepository.__new__(AnimalRepository)
         repo.collection = MagicMock()
         
-        mock_cursor = MagicMock()
-        mock_cursor.sort.return_value = mock_cursor
-        mock_cursor.skip.return_value = mock_cursor
-        mock_cursor.limit.return_value = []
+        mock_cursor = FakeCursor()
         repo.collection.find.return_value = mock_cursor
         
         custom_projection = {"breed": 1, "age_upon_outcome_in_weeks": 1}
@@ -163,6 +159,425 @@ class TestAnimalRepositoryRead:
         
         call_args = repo.collection.find.call_args
         assert call_args[1].get("projection") == custom_projection
+    
+    def test_read_batch_size_matches_limit(self):
+        """The page is fetched in a single batch: batch_size and limit agree."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        
+        mock_cursor = FakeCursor()
+        repo.collection.find.return_value = mock_cursor
+        
+        repo.read({}, limit=25)
+        assert repo.collection.find.call_args.kwargs["batch_size"] == 25
+        assert mock_cursor.limit_calls[-1] == 25
+        
+        repo.read({}, limit=1000)
+        assert repo.collection.find.call_args.kwargs["batch_size"] == 500
+        assert mock_cursor.limit_calls[-1] == 500
+    
+    def test_find_raw_sends_encoded_filter(self):
+        """find_raw hands the pre-encoded bytes to find as a RawBSONDocument."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        
+        mock_cursor = FakeCursor()
+        repo.collection.find.return_value = mock_cursor
+        
+        encoded = bson.encode({"breed": "Lab"})
+        repo.find_raw(encoded, limit=10)
+        
+        sent = repo.collection.find.call_args[0][0]
+        assert sent.raw == encoded
+    
+    def test_read_sends_shared_prebuilt_query(self):
+        """Prebuilt rescue queries reach find as the same encoded object every call."""
+        from services.query_service import build_rescue_query
+        
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.find.return_value = FakeCursor()
+        
+        repo.read(build_rescue_query("water"))
+        first = repo.collection.find.call_args[0][0]
+        repo.read(build_rescue_query("water"))
+        second = repo.collection.find.call_args[0][0]
+        
+        assert first is second
+
+
+class TestAnimalRepositoryIterRead:
+    """Tests for streaming reads."""
+    
+    def _repo(self, docs):
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        mock_cursor = FakeCursor(docs)
+        repo.collection.find.return_value = mock_cursor
+        return repo, mock_cursor
+    
+    def test_yields_docs_and_closes_cursor(self):
+        """Docs are streamed from the cursor, which is closed when exhausted."""
+        repo, mock_cursor = self._repo([{"breed": "Lab"}, {"breed": "Pug"}])
+        
+        stream = repo.iter_read({}, sort=[("breed", 1)])
+        
+        assert not isinstance(stream, list)
+        assert list(stream) == [{"breed": "Lab"}, {"breed": "Pug"}]
+        assert mock_cursor.close_calls == 1
+    
+    def test_closes_cursor_when_consumer_stops_early(self):
+        """Abandoning the stream still closes the server cursor."""
+        repo, mock_cursor = self._repo([{"breed": "Lab"}, {"breed": "Pug"}])
+        
+        stream = repo.iter_read({})
+        next(stream)
+        stream.close()
+        
+        assert mock_cursor.close_calls == 1
+    
+    def test_error_mid_stream_reaches_consumer(self):
+        """A cursor failure after some docs is raised, not ended silently, and the cursor is closed."""
+        from pymongo.errors import PyMongoError
+        
+        def failing():
+            yield {"breed": "Lab"}
+            raise PyMongoError("connection lost")
+        
+        repo, mock_cursor = self._repo([])
+        mock_cursor.docs = failing()
+        
+        seen = []
+        with pytest.raises(PyMongoError):
+            for doc in repo.iter_read({}):
+                seen.append(doc)
+        
+        assert seen == [{"breed": "Lab"}]
+        assert mock_cursor.close_calls == 1
+    
+    def test_validates_query_type_eagerly(self):
+        """A bad query is rejected at call time, not on first iteration."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        
+        with pytest.raises(ValueError):
+            repo.iter_read("not a dict")
+
+
+class TestAnimalRepositoryReadColumnar:
+    """Tests for struct-of-arrays reads."""
+    
+    def test_returns_one_column_per_field(self):
+        """Docs are unpacked into per-field columns; numeric fields are double arrays."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.find.return_value = [
+            {"breed": "Lab", "age_upon_outcome_in_weeks": 52},
+            {"breed": "Pug", "age_upon_outcome_in_weeks": "unknown"},
+            {"age_upon_outcome_in_weeks": 10.5},
+        ]
+        
+        columns = repo.read_columnar({}, ["breed", "age_upon_outcome_in_weeks"])
+        
+        assert columns["breed"] == ["Lab", "Pug", None]
+        ages = columns["age_upon_outcome_in_weeks"]
+        assert ages.typecode == "d"
+        assert ages[0] == 52.0 and ages[2] == 10.5
+        assert math.isnan(ages[1])
+        assert repo.collection.find.call_args.kwargs["projection"] == {
+            "breed": 1, "age_upon_outcome_in_weeks": 1, "_id": 0,
+        }
+    
+    def test_duplicate_fields_fill_one_column(self):
+        """Repeated field names map to a single column with one entry per doc."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.find.return_value = [
+            {"breed": "Lab", "age_upon_outcome_in_weeks": 52},
+            {"breed": "Pug", "age_upon_outcome_in_weeks": 10},
+        ]
+        
+        columns = repo.read_columnar({}, ["breed", "age_upon_outcome_in_weeks", "breed", "age_upon_outcome_in_weeks"])
+        
+        assert list(columns) == ["breed", "age_upon_outcome_in_weeks"]
+        assert columns["breed"] == ["Lab", "Pug"]
+        assert list(columns["age_upon_outcome_in_weeks"]) == [52.0, 10.0]
+    
+    def test_validates_query_type(self):
+        """read_columnar validates that query is a dict."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        
+        with pytest.raises(ValueError):
+            repo.read_columnar("not a dict", ["breed"])
+
+
+class TestAnimalRepositoryReadPageWithCount:
+    """Tests for the combined page + total $facet query."""
+    
+    def test_single_aggregate_with_facet(self):
+        """Page and count come from one aggregate call using $facet."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = iter([
+            {"data": [{"breed": "Lab"}], "total": [{"n": 42}]},
+        ])
+        
+        docs, total = repo.read_page_with_count(
+            {"breed": "Lab"}, sort=[("name", 1)], skip=10, limit=10,
+        )
+        
+        assert docs == [{"breed": "Lab"}]
+        assert total == 42
+        assert repo.collection.aggregate.call_count == 1
+        pipeline = repo.collection.aggregate.call_args[0][0]
+        assert pipeline == [
+            {"$match": {"breed": "Lab"}},
+            {"$facet": {
+                "data": [
+                    {"$sort": {"name": 1}},
+                    {"$skip": 10},
+                    {"$limit": 10},
+                    {"$project": {"_id": 0}},
+                ],
+                "total": [{"$count": "n"}],
+            }},
+        ]
+    
+    def test_no_matches_counts_zero(self):
+        """$count emits nothing for an empty match; total is reported as 0."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = iter([{"data": [], "total": []}])
+        
+        assert repo.read_page_with_count({}) == ([], 0)
+    
+    def test_validates_query_type(self):
+        """read_page_with_count validates that query is a dict."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        
+        with pytest.raises(ValueError):
+            repo.read_page_with_count("not a dict")
+
+
+class TestAnimalRepositoryReadBatched:
+    """Tests for coalescing point lookups into one $in query."""
+    
+    def test_merges_single_differing_key_into_in(self):
+        """Queries differing only in one scalar become one $in find."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.find.return_value = [
+            {"animal_id": "A2", "name": "Rex"},
+            {"animal_id": "A1", "name": "Max"},
+        ]
+        
+        results = repo.read_batched([
+            {"animal_id": "A1", "outcome_type": "Adoption"},
+            {"animal_id": "A2", "outcome_type": "Adoption"},
+            {"animal_id": "A3", "outcome_type": "Adoption"},
+        ])
+        
+        assert repo.collection.find.call_count == 1
+        assert repo.collection.find.call_args[0][0] == {
+            "animal_id": {"$in": ["A1", "A2", "A3"]}, "outcome_type": "Adoption",
+        }
+        assert results == [
+            [{"animal_id": "A1", "name": "Max"}],
+            [{"animal_id": "A2", "name": "Rex"}],
+            [],
+        ]
+    
+    def test_projection_keeps_routing_key_out_of_results(self):
+        """The merge key is fetched for routing but not returned if unrequested."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.find.return_value = [{"animal_id": "A1", "name": "Max"}]
+        
+        results = repo.read_batched([{"animal_id": "A1"}, {"animal_id": "A2"}], projection={"name": 1, "_id": 0})
+        
+        assert repo.collection.find.call_args.kwargs["projection"] == {"name": 1, "_id": 0, "animal_id": 1}
+        assert results == [[{"name": "Max"}], []]
+    
+    def test_array_and_unhashable_merge_values(self):
+        """Array values route to each matching query; unhashable values are skipped."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.find.return_value = [
+            {"animal_id": ["A1", "A2", "A1"], "name": "Max"},
+            {"animal_id": [{"nested": "A1"}], "name": "Rex"},
+            {"animal_id": {"id": "A2"}, "name": "Bo"},
+        ]
+        
+        results = repo.read_batched([{"animal_id": "A1"}, {"animal_id": "A2"}])
+        
+        assert [[d["name"] for d in r] for r in results] == [["Max"], ["Max"]]
+    
+    def test_queries_with_same_value_get_independent_docs(self):
+        """Mutating one query's result does not change another's."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.find.return_value = [{"animal_id": "A1", "name": "Max"}]
+        
+        results = repo.read_batched([{"animal_id": "A1"}, {"animal_id": "A2"}, {"animal_id": "A1"}])
+        results[0][0]["name"] = "Changed"
+        
+        assert results[2] == [{"animal_id": "A1", "name": "Max"}]
+    
+    def test_unmergeable_queries_fall_back_to_separate_finds(self):
+        """Queries differing in more than one field are issued individually."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.find.return_value = []
+        
+        repo.read_batched([{"breed": "Lab", "name": "Max"}, {"breed": "Pug", "name": "Rex"}])
+        
+        assert repo.collection.find.call_count == 2
+    
+    @pytest.mark.parametrize("queries", [
+        [{"outcome.type": "Adoption"}, {"outcome.type": "Transfer"}],
+        [{"flag": True}, {"flag": 1}],
+        [{"flag": False}, {"flag": 0}],
+    ])
+    def test_dotted_keys_and_bools_are_not_merged(self, queries):
+        """Dotted merge keys and bool values fall back to one find per query."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.find.side_effect = lambda q, projection: [dict(q)]
+        
+        results = repo.read_batched(queries)
+        
+        assert repo.collection.find.call_count == 2
+        assert results == [[q] for q in queries]
+    
+    def test_validates_query_types(self):
+        """read_batched validates that every query is a dict."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        
+        with pytest.raises(ValueError):
+            repo.read_batched([{}, "not a dict"])
+
+
+class TestAnimalRepositoryReadAfter:
+    """Tests for keyset (range) pagination via read_after."""
+    
+    def _repo(self, docs):
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        mock_cursor = FakeCursor(docs)
+        repo.collection.find.return_value = mock_cursor
+        return repo, mock_cursor
+    
+    def test_first_page_has_no_range_predicate(self):
+        """Without a token the caller's query is passed through unchanged."""
+        repo, _ = self._repo([])
+        
+        repo.read_after({"breed": "Lab"}, sort=[("name", 1)], limit=10)
+        
+        assert repo.collection.find.call_args[0][0] == {"breed": "Lab"}
+    
+    def test_next_page_merges_range_predicate_without_skip(self):
+        """A token becomes an $and'ed range predicate; skip is never used."""
+        repo, mock_cursor = self._repo([])
+        
+        repo.read_after(
+            {"breed": "Lab"}, sort=[("age_upon_outcome_in_weeks", -1)], limit=10,
+            after={"age_upon_outcome_in_weeks": 52, "_id": 7},
+        )
+        
+        assert repo.collection.find.call_args[0][0] == {"$and": [
+            {"breed": "Lab"},
+            {"$or": [
+                {"$or": [{"age_upon_outcome_in_weeks": {"$lt": 52}}, {"age_upon_outcome_in_weeks": None}]},
+                {"age_upon_outcome_in_weeks": 52, "_id": {"$lt": 7}},
+            ]},
+        ]}
+        assert mock_cursor.skip_calls == []
+    
+    def test_sort_gets_id_tie_breaker(self):
+        """_id is appended to the sort so equal keys page deterministically."""
+        repo, mock_cursor = self._repo([])
+        
+        repo.read_after({}, sort=[("name", 1)], limit=10)
+        
+        assert mock_cursor.sort_calls[-1] == [("name", 1), ("_id", 1)]
+    
+    def test_full_page_returns_next_token(self):
+        """The token is built from the last row's sort keys and _id."""
+        repo, _ = self._repo([{"name": "A", "_id": 1}, {"name": "B", "_id": 2}])
+        
+        docs, next_after = repo.read_after({}, sort=[("name", 1)], limit=2)
+        
+        assert next_after == {"name": "B", "_id": 2}
+        assert docs == [{"name": "A"}, {"name": "B"}]
+    
+    def test_short_page_has_no_next_token(self):
+        """A page shorter than limit is the last one."""
+        repo, _ = self._repo([{"name": "A", "_id": 1}])
+        
+        _, next_after = repo.read_after({}, sort=[("name", 1)], limit=2)
+        
+        assert next_after is None
+    
+    def test_pages_cover_all_rows_once(self):
+        """Walking the tokens visits every document exactly once, in order."""
+        mongomock = pytest.importorskip("mongomock")
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = mongomock.MongoClient().db.animals
+        repo.collection.insert_many([{"_id": i, "name": "Dog", "age_upon_outcome_in_weeks": i % 3} for i in range(7)])
+        
+        seen, after = [], None
+        while True:
+            docs, after = repo.read_after({}, sort=[("age_upon_outcome_in_weeks", 1)], limit=3,
+                                          after=after, projection={"age_upon_outcome_in_weeks": 1})
+            seen.extend(d["age_upon_outcome_in_weeks"] for d in docs)
+            if after is None:
+                break
+        
+        assert seen == sorted(i % 3 for i in range(7))
+    
+    @pytest.mark.parametrize("direction", [1, -1])
+    def test_pages_cover_null_and_missing_sort_values(self, direction):
+        """Rows with a null or missing sort key are paged like any other value."""
+        mongomock = pytest.importorskip("mongomock")
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = mongomock.MongoClient().db.animals
+        names = ["B", None, "A", None, "C", "A", None]
+        repo.collection.insert_many([
+            {"_id": i, **({} if i == 3 else {"name": name})} for i, name in enumerate(names)
+        ])
+        
+        seen, after = [], None
+        while True:
+            docs, after = repo.read_after({}, sort=[("name", direction)], limit=2,
+                                          after=after, projection={"name": 1, "_id": 1})
+            seen.extend(d["_id"] for d in docs)
+            if after is None:
+                break
+        
+        # _id ties follow the sort direction
+        if direction == 1:
+            assert seen == [1, 3, 6] + [2, 5, 0, 4]
+        else:
+            assert seen == [4, 0, 5, 2] + [6, 3, 1]
+    
+    def test_null_token_predicates(self):
+        """A null token value moves to non-null ascending and only tie-breaks (on _id) descending."""
+        repo, _ = self._repo([])
+        
+        repo.read_after({}, sort=[("name", 1)], limit=10, after={"name": None, "_id": 3})
+        assert repo.collection.find.call_args[0][0] == {"$or": [
+            {"name": {"$ne": None}},
+            {"name": None, "_id": {"$gt": 3}},
+        ]}
+        
+        repo.read_after({}, sort=[("name", -1)], limit=10, after={"name": None, "_id": 3})
+        assert repo.collection.find.call_args[0][0] == {"name": None, "_id": {"$lt": 3}}
+    
+    def test_read_after_validates_query_type(self):
+        """read_after validates that query is a dict."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        
+        with pytest.raises(ValueError):
+            repo.read_after("not a dict")
 
 
 class TestAnimalRepositoryCountDocuments:
@@ -195,6 +610,74 @@ class TestAnimalRepositoryCountDocuments:
         result = repo.count_documents({})
         
         assert result == 0
+    
+    def test_count_documents_accepts_raw_bson_query(self):
+        """Pre-encoded queries are counted (and cached) like dicts."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.count_documents.return_value = 3
+        query = RawBSONDocument(bson.encode({"breed": "Lab"}))
+        
+        assert repo.count_documents(query) == 3
+        assert repo.count_documents(query) == 3
+        
+        assert repo.collection.count_documents.call_count == 1
+    
+    def test_count_documents_forwards_cap_as_limit(self):
+        """A cap is forwarded as the server-side count limit."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.count_documents.return_value = 1000
+        
+        count = repo.count_documents({"breed": "Lab"}, cap=1000)
+        
+        assert count == 1000
+        assert repo.collection.count_documents.call_args.kwargs["limit"] == 1000
+    
+    def test_count_documents_uncapped_by_default(self):
+        """Without a cap no limit is sent, so the count is exact."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.count_documents.return_value = 5
+        
+        repo.count_documents({})
+        
+        assert "limit" not in repo.collection.count_documents.call_args.kwargs
+    
+    def test_count_documents_is_cached(self):
+        """Repeat counts for the same query shape hit the server once."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.count_documents.return_value = 7
+        
+        assert repo.count_documents({"breed": "Lab", "sex_upon_outcome": "Intact Male"}) == 7
+        assert repo.count_documents({"sex_upon_outcome": "Intact Male", "breed": "Lab"}) == 7
+        
+        assert repo.collection.count_documents.call_count == 1
+    
+    def test_count_documents_cache_expires(self):
+        """Counts are re-issued once the TTL has passed."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.count_documents.return_value = 7
+        
+        with patch("data.mongo_repo.time.monotonic", side_effect=[100.0, 200.0]):
+            repo.count_documents({})
+            repo.count_documents({})
+        
+        assert repo.collection.count_documents.call_count == 2
+    
+    def test_invalidate_counts_forces_recount(self):
+        """invalidate_counts drops cached counts."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.count_documents.return_value = 7
+        
+        repo.count_documents({})
+        repo.invalidate_counts()
+        repo.count_documents({})
+        
+        assert repo.collection.count_documents.call_count == 2
 
 
 class TestAnimalRepositoryAggregateBreedCounts:
@@ -248,6 +731,77 @@ class TestAnimalRepositoryAggregateBreedCounts:
         
         # First stage should be $match with the query
         assert pipeline[0]["$match"] == query
+    
+    def test_aggregate_breed_counts_hints_breed_index_for_all(self):
+        """An unfiltered count is hinted onto the single-field breed index."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_breed_counts({})
+        
+        assert repo.collection.aggregate.call_args.kwargs["hint"] == "idx_breed"
+    
+    def test_aggregate_breed_counts_hints_rescue_index(self):
+        """Rescue filters are hinted onto the compound rescue index."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_breed_counts({"breed": {"$in": ["Bloodhound"]}, "sex_upon_outcome": "Intact Male"})
+        
+        assert repo.collection.aggregate.call_args.kwargs["hint"] == "idx_rescue_filter"
+    
+    @pytest.mark.parametrize("query", [
+        {"sex_upon_outcome": "Intact Male"},
+        {"age_upon_outcome_in_weeks": {"$gte": 26, "$lte": 156}},
+    ])
+    def test_aggregate_breed_counts_no_hint_without_breed_prefix(self, query):
+        """Sex- or age-only filters do not force the breed-prefixed compound index."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_breed_counts(query)
+        
+        assert "hint" not in repo.collection.aggregate.call_args.kwargs
+    
+    def test_aggregate_breed_counts_no_hint_for_other_fields(self):
+        """Queries on fields outside the indexes are left to the planner."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_breed_counts({"color": "Black"})
+        
+        assert "hint" not in repo.collection.aggregate.call_args.kwargs
+    
+    def test_aggregate_breed_counts_is_bounded(self):
+        """Breed counts are capped server-side and streamed in one batch."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_breed_counts({})
+        
+        pipeline = repo.collection.aggregate.call_args[0][0]
+        kwargs = repo.collection.aggregate.call_args[1]
+        assert {"$limit": 100} in pipeline
+        assert kwargs["batchSize"] == 100
+        assert kwargs["allowDiskUse"] is False
+        assert kwargs["maxTimeMS"] == 2000
+    
+    def test_aggregate_breed_counts_projects_breed_before_group(self):
+        """Documents are narrowed to breed right after $match."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_breed_counts({"breed": "Lab"})
+        
+        pipeline = repo.collection.aggregate.call_args[0][0]
+        assert pipeline[1] == {"$project": {"_id": 0, "breed": 1}}
+        assert "$group" in pipeline[2]
 
 
 class TestAnimalRepositoryPing:
@@ -284,6 +838,103 @@ class TestAnimalRepositoryPing:
         result = repo.ping()
         
         assert result is False
+    
+    def test_ping_result_is_cached(self):
+        """Back-to-back pings share one admin command within the TTL."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.client = MagicMock()
+        
+        assert repo.ping() is True
+        assert repo.ping() is True
+        
+        assert repo.client.admin.command.call_count == 1
+    
+    def test_ping_rechecks_after_ttl(self):
+        """An expired cached result triggers a fresh admin command."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.client = MagicMock()
+        
+        repo.ping()
+        # Age the cached result past the TTL (patching time.monotonic would
+        # also affect the driver's own timeout bookkeeping).
+        checked_at, alive = repo._ping_cache
+        repo._ping_cache = (checked_at - 60.0, alive)
+        repo.ping()
+        
+        assert repo.client.admin.command.call_count == 2
+    
+    def test_ping_is_time_bounded(self):
+        """The whole ping, server selection included, runs under a 500 ms timeout."""
+        import pymongo
+        
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.client = MagicMock()
+        
+        with patch("pymongo.timeout", wraps=pymongo.timeout) as op_timeout:
+            repo.ping()
+        
+        op_timeout.assert_called_once_with(0.5)
+        repo.client.admin.command.assert_called_once_with("ping")
+    
+    def test_ping_lock_is_per_repository(self):
+        """A ping stuck on one repository does not block another repository."""
+        import threading
+        
+        release = threading.Event()
+        blocked = AnimalRepository.__new__(AnimalRepository)
+        blocked.client = MagicMock()
+        blocked.client.admin.command.side_effect = lambda *a, **k: release.wait(5)
+        other = AnimalRepository.__new__(AnimalRepository)
+        other.client = MagicMock()
+        
+        stuck = threading.Thread(target=blocked.ping)
+        stuck.start()
+        try:
+            done = threading.Thread(target=other.ping)
+            done.start()
+            done.join(1)
+            assert not done.is_alive()
+        finally:
+            release.set()
+            stuck.join()
+    
+    def test_concurrent_pings_share_one_command(self):
+        """Threads that miss the cache together issue a single admin command."""
+        import threading
+        import time
+        
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.client = MagicMock()
+        repo.client.admin.command.side_effect = lambda *a, **k: time.sleep(0.05)
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(repo.ping())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert results == [True] * 8
+        assert repo.client.admin.command.call_count == 1
+    
+    def test_connect_uses_client_options(self):
+        """connect builds the client from CLIENT_OPTIONS and drops the old one."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        old_client = MagicMock()
+        repo.client = old_client
+        repo._ping_cache = (0.0, False)
+        
+        with patch("data.mongo_repo.MongoClient") as client_cls:
+            repo.connect("mongodb://db:27017")
+        
+        options = client_cls.call_args.kwargs
+        assert client_cls.call_args.args == ("mongodb://db:27017",)
+        assert options["serverSelectionTimeoutMS"] == 500
+        assert options["maxPoolSize"] == 20
+        assert repo.client is client_cls.return_value
+        assert repo.collection is client_cls.return_value["aac"]["animals"]
+        assert not hasattr(repo, "_ping_cache")
+        old_client.close.assert_called_once()
 
 
 class TestAnimalRepositoryServerSideSorting:
@@ -294,43 +945,34 @@ class TestAnimalRepositoryServerSideSorting:
         repo = AnimalRepository.__new__(AnimalRepository)
         repo.collection = MagicMock()
         
-        mock_cursor = MagicMock()
-        mock_cursor.sort.return_value = mock_cursor
-        mock_cursor.skip.return_value = mock_cursor
-        mock_cursor.limit.return_value = []
+        mock_cursor = FakeCursor()
         repo.collection.find.return_value = mock_cursor
         
         # Sort by match_score descending
         repo.read({}, sort=[("match_score", -1)])
         
-        mock_cursor.sort.assert_called_with([("match_score", -1)])
+        assert mock_cursor.sort_calls[-1] == [("match_score", -1)]
     
     def test_sort_by_multiple_fields(self):
         """Results can be sorted by multiple fields."""
         repo = AnimalRepository.__new__(AnimalRepository)
         repo.collection = MagicMock()
         
-        mock_cursor = MagicMock()
-        mock_cursor.sort.return_value = mock_cursor
-        mock_cursor.skip.return_value = mock_cursor
-        mock_cursor.limit.return_value = []
+        mock_cursor = FakeCursor()
         repo.collection.find.return_value = mock_cursor
         
         # Sort by score desc, then breed asc
         sort_spec = [("match_score", -1), ("breed", 1)]
         repo.read({}, sort=sort_spec)
         
-        mock_cursor.sort.assert_called_with(sort_spec)
+        assert mock_cursor.sort_calls[-1] == sort_spec
     
     def test_sort_order_is_preserved(self):
         """Sort specifications are applied in order."""
         repo = AnimalRepository.__new__(AnimalRepository)
         repo.collection = MagicMock()
         
-        mock_cursor = MagicMock()
-        mock_cursor.sort.return_value = mock_cursor
-        mock_cursor.skip.return_value = mock_cursor
-        mock_cursor.limit.return_value = []
+        mock_cursor = FakeCursor()
         repo.collection.find.return_value = mock_cursor
         
         # Multiple sort specs
@@ -338,4 +980,136 @@ class TestAnimalRepositoryServerSideSorting:
         repo.read({}, sort=sorts)
         
         # Verify exact sort spec was passed
-        mock_cursor.sort.assert_called_with(sorts)
+        assert mock_cursor.sort_calls[-1] == sorts
+
+
+class TestAnimalRepositoryAggregateRanked:
+    """Tests for server-side scoring, ranking and paging."""
+    
+    SCORE_STAGES = [{"$addFields": {"match_score": {"$literal": 0}}}]
+    
+    def test_scores_before_sorting_by_match_score(self):
+        """Score stages run before $sort when ranking by match_score."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_ranked({"breed": "Lab"}, self.SCORE_STAGES,
+                              sort=[("match_score", -1)], skip=20, limit=10)
+        
+        pipeline = repo.collection.aggregate.call_args[0][0]
+        assert pipeline[0] == {"$match": {"breed": "Lab"}}
+        assert pipeline[1] == self.SCORE_STAGES[0]
+        assert pipeline[2] == {"$sort": {"match_score": -1, "_id": -1}}
+        assert pipeline[3] == {"$skip": 20}
+        assert pipeline[4] == {"$limit": 10}
+        assert pipeline[-1] == {"$project": {"_id": 0}}
+    
+    def test_scores_only_page_when_sort_ignores_score(self):
+        """Sorting on a stored field sorts right after $match, then scores the page."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_ranked({}, self.SCORE_STAGES, sort=[("breed", 1)], limit=10,
+                              projection={"breed": 1, "_id": 0})
+        
+        pipeline = repo.collection.aggregate.call_args[0][0]
+        stages = [next(iter(stage)) for stage in pipeline]
+        assert stages == ["$match", "$sort", "$skip", "$limit", "$project", "$addFields", "$project"]
+    
+    @pytest.mark.parametrize("direction", [1, -1])
+    def test_tie_breaker_follows_sort_direction(self, direction):
+        """{field: d, _id: d} can be walked on the {field: 1, _id: 1} index either way."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_ranked({}, self.SCORE_STAGES, sort=[("name", direction)])
+        
+        pipeline = repo.collection.aggregate.call_args[0][0]
+        assert pipeline[1] == {"$sort": {"name": direction, "_id": direction}}
+    
+    def test_no_sort_stage_without_sort(self):
+        """Without a sort the natural order is kept and no $sort is issued."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_ranked({}, self.SCORE_STAGES)
+        
+        pipeline = repo.collection.aggregate.call_args[0][0]
+        assert all("$sort" not in stage for stage in pipeline)
+    
+    def test_projection_applied_before_scoring(self):
+        """A projection narrows documents right after $match, keeping _id for sorting."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_ranked({}, self.SCORE_STAGES, sort=[("match_score", -1)],
+                              projection={"breed": 1, "_id": 0})
+        
+        pipeline = repo.collection.aggregate.call_args[0][0]
+        assert pipeline[1] == {"$project": {"breed": 1}}
+        assert pipeline[2] == self.SCORE_STAGES[0]
+        assert pipeline[-1] == {"$project": {"_id": 0}}
+    
+    def test_caps_limit_at_500(self):
+        """Limit is capped at 500 like read()."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.aggregate_ranked({}, self.SCORE_STAGES, limit=1000)
+        
+        pipeline = repo.collection.aggregate.call_args[0][0]
+        assert {"$limit": 500} in pipeline
+
+
+class TestAnimalRepositoryReadScored:
+    """Tests for the server-side top-N scoring shortcut."""
+    
+    def test_scores_before_sorting_and_limits(self):
+        """$addFields computes match_score before $sort; only the top N are returned."""
+        from services.ranking_service import build_score_stages, criteria_for_filter
+        
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        repo.collection.aggregate.return_value = []
+        
+        repo.read_scored({}, build_score_stages(criteria_for_filter("water")), limit=5)
+        
+        pipeline = repo.collection.aggregate.call_args[0][0]
+        stages = [next(iter(stage)) for stage in pipeline]
+        last_add = max(i for i, name in enumerate(stages) if name == "$addFields")
+        assert last_add < stages.index("$sort")
+        assert pipeline[stages.index("$sort")] == {"$sort": {"match_score": -1, "_id": -1}}
+        assert {"$limit": 5} in pipeline
+
+
+class TestAnimalRepositoryEnsureIndexes:
+    """Tests for index creation."""
+    
+    def test_creates_rescue_compound_index(self):
+        """The compound index matches the rescue filter predicates."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        
+        repo.ensure_indexes()
+        
+        keys = [c.args[0] for c in repo.collection.create_index.call_args_list]
+        assert [("breed", 1), ("sex_upon_outcome", 1), ("age_upon_outcome_in_weeks", 1)] in keys
+        assert [("breed", 1)] in keys
+        assert [("sex_upon_outcome", 1)] in keys
+    
+    def test_creates_index_per_sortable_column(self):
+        """Every sortable DataTable column has a {field, _id} index for its tie-broken sort."""
+        repo = AnimalRepository.__new__(AnimalRepository)
+        repo.collection = MagicMock()
+        
+        repo.ensure_indexes()
+        
+        keys = [c.args[0] for c in repo.collection.create_index.call_args_list]
+        for field in ("breed", "sex_upon_outcome", "age_upon_outcome_in_weeks", "name", "animal_id"):
+            assert [(field, 1), ("_id", 1)] in keys
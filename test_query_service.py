@@ -2,136 +2,128 @@
 Tests for query service validation and query building.
 """
 
+import bson
 import pytest
-from services.query_service import validate_filter_type, build_rescue_query
+from bson.raw_bson import RawBSONDocument
+from services.query_service import validate_filter_type, build_rescue_query, build_rescue_query_bson, get_rescue
+from services.ranking_service import criteria_for_filter
 
 
 class TestValidateFilterType:
     """Tests for filter type validation."""
     
-    def test_validate_all_filter(self):
-        """'all' is a valid filter."""
-        assert validate_filter_type("all") == "all"
+    @pytest.mark.parametrize("kind", ["all", "water", "mountain", "disaster"])
+    def test_validate_accepts_known_filter(self, kind):
+        """Each known filter is valid and returned unchanged."""
+        assert validate_filter_type(kind) == kind
     
-    def test_validate_water_filter(self):
-        """'water' is a valid filter."""
-        assert validate_filter_type("water") == "water"
-    
-    def test_validate_mountain_filter(self):
-        """'mountain' is a valid filter."""
-        assert validate_filter_type("mountain") == "mountain"
-    
-    def test_validate_disaster_filter(self):
-        """'disaster' is a valid filter."""
-        assert validate_filter_type("disaster") == "disaster"
-    
-    def test_validate_rejects_invalid_filter(self):
-        """Invalid filter type raises ValueError."""
-        with pytest.raises(ValueError):
-            validate_filter_type("invalid")
-    
-    def test_validate_rejects_empty_string(self):
-        """Empty string is rejected."""
-        with pytest.raises(ValueError):
-            validate_filter_type("")
-    
-    def test_validate_case_sensitive(self):
-        """Filter validation is case-sensitive."""
+    @pytest.mark.parametrize("value", [
+        pytest.param("invalid", id="unknown"),
+        pytest.param("", id="empty"),
+        pytest.param("WATER", id="case-sensitive"),
+        pytest.param(" water", id="whitespace"),
+    ])
+    def test_validate_rejects_bad_string(self, value):
+        """Unknown, empty, wrong-case and padded strings raise ValueError."""
         with pytest.raises(ValueError):
-            validate_filter_type("WATER")
+            validate_filter_type(value)
     
-    def test_validate_with_whitespace(self):
-        """Filter with whitespace is rejected."""
+    @pytest.mark.parametrize("value", [None, 1, ["water"]])
+    def test_validate_rejects_non_string(self, value):
+        """Non-string input, including unhashable values, raises ValueError."""
         with pytest.raises(ValueError):
-            validate_filter_type(" water")
+            validate_filter_type(value)
 
 
 class TestBuildRescueQuery:
     """Tests for rescue query building."""
     
-    def test_build_water_query(self):
-        """Water filter builds correct MongoDB query."""
-        query = build_rescue_query("water")
-        
-        # Should have $and array with three conditions
-        assert "$and" in query
-        assert len(query["$and"]) == 3
-        
-        # Check breed condition
-        breed_cond = [c for c in query["$and"] if "breed" in c][0]
-        assert set(breed_cond["breed"]["$in"]) == {
-            "Labrador Retriever Mix",
-            "Chesapeake Bay Retriever",
-            "Newfoundland"
-        }
-        
-        # Check sex condition
-        sex_cond = [c for c in query["$and"] if "sex_upon_outcome" in c][0]
-        assert sex_cond["sex_upon_outcome"] == "Intact Female"
-        
-        # Check age condition
-        age_cond = [c for c in query["$and"] if "age_upon_outcome_in_weeks" in c][0]
-        assert age_cond["age_upon_outcome_in_weeks"]["$gte"] == 26
-        assert age_cond["age_upon_outcome_in_weeks"]["$lte"] == 156
-    
-    def test_build_mountain_query(self):
-        """Mountain filter builds correct MongoDB query."""
-        query = build_rescue_query("mountain")
-        
-        assert "$and" in query
-        assert len(query["$and"]) == 3
-        
-        # Check breed condition has right breeds
-        breed_cond = [c for c in query["$and"] if "breed" in c][0]
-        assert "German Shepherd" in breed_cond["breed"]["$in"]
-        assert "Rottweiler" in breed_cond["breed"]["$in"]
-        assert "Alaskan Malamute" in breed_cond["breed"]["$in"]
-        
-        # Check sex is male
-        sex_cond = [c for c in query["$and"] if "sex_upon_outcome" in c][0]
-        assert sex_cond["sex_upon_outcome"] == "Intact Male"
-    
-    def test_build_disaster_query(self):
-        """Disaster filter builds correct MongoDB query."""
-        query = build_rescue_query("disaster")
+    @pytest.mark.parametrize("kind,expected_breeds,expected_sex,age_lo,age_hi", [
+        pytest.param(
+            "water",
+            {"Labrador Retriever Mix", "Chesapeake Bay Retriever", "Newfoundland"},
+            "Intact Female", 26, 156,  # 6 months to 3 years
+            id="water",
+        ),
+        pytest.param(
+            "mountain",
+            {"German Shepherd", "Alaskan Malamute", "Old English Sheepdog", "Siberian Husky", "Rottweiler"},
+            "Intact Male", 26, 156,  # 6 months to 3 years
+            id="mountain",
+        ),
+        pytest.param(
+            "disaster",
+            {"Doberman Pinscher", "German Shepherd", "Golden Retriever", "Bloodhound", "Rottweiler"},
+            "Intact Male", 20, 300,  # 5 months to 7 years
+            id="disaster",
+        ),
+    ])
+    def test_build_rescue_query(self, kind, expected_breeds, expected_sex, age_lo, age_hi):
+        """Each rescue filter builds the correct MongoDB query."""
+        query = build_rescue_query(kind)
         
-        assert "$and" in query
+        # Should have three top-level (implicitly AND-ed) conditions
+        assert "$and" not in query
+        assert len(query) == 3
         
-        # Check breed condition has right breeds
-        breed_cond = [c for c in query["$and"] if "breed" in c][0]
-        assert "Doberman Pinscher" in breed_cond["breed"]["$in"]
-        assert "Bloodhound" in breed_cond["breed"]["$in"]
-        
-        # Check age range is different (longer)
-        age_cond = [c for c in query["$and"] if "age_upon_outcome_in_weeks" in c][0]
-        assert age_cond["age_upon_outcome_in_weeks"]["$gte"] == 20
-        assert age_cond["age_upon_outcome_in_weeks"]["$lte"] == 300
+        assert set(query["breed"]["$in"]) == expected_breeds
+        assert query["sex_upon_outcome"] == expected_sex
+        assert query["age_upon_outcome_in_weeks"]["$gte"] == age_lo
+        assert query["age_upon_outcome_in_weeks"]["$lte"] == age_hi
     
     def test_build_all_query(self):
         """All filter returns empty query (no filtering)."""
         query = build_rescue_query("all")
         
-        assert query == {}
+        assert dict(query) == {}
     
     def test_build_query_validates_input(self):
         """Invalid filter type raises ValueError."""
         with pytest.raises(ValueError):
             build_rescue_query("invalid")
     
-    def test_water_age_range(self):
-        """Water filter has correct age range (6 months to 3 years)."""
-        query = build_rescue_query("water")
-        age_cond = [c for c in query["$and"] if "age_upon_outcome_in_weeks" in c][0]
+    def test_queries_are_prebuilt(self):
+        """Queries are built once at import and shared between calls."""
+        assert build_rescue_query("water") is build_rescue_query("water")
+    
+    @pytest.mark.parametrize("kind", ["all", "water", "mountain", "disaster"])
+    def test_query_is_pre_encoded_bson(self, kind):
+        """The query is a RawBSONDocument over the pre-encoded bytes."""
+        query = build_rescue_query(kind)
         
-        # 6 months = 26 weeks, 3 years = 156 weeks
-        assert age_cond["age_upon_outcome_in_weeks"]["$gte"] == 26
-        assert age_cond["age_upon_outcome_in_weeks"]["$lte"] == 156
+        assert isinstance(query, RawBSONDocument)
+        assert query.raw == build_rescue_query_bson(kind)
     
-    def test_disaster_age_range(self):
-        """Disaster filter has extended age range (5 months to 7 years)."""
-        query = build_rescue_query("disaster")
-        age_cond = [c for c in query["$and"] if "age_upon_outcome_in_weeks" in c][0]
+    def test_bson_decodes_to_rescue_conditions(self):
+        """Pre-encoded BSON decodes to the expected plain query."""
+        decoded = bson.decode(build_rescue_query_bson("water"))
         
-        # 5 months = 20 weeks, 7 years = 300 weeks
-        assert age_cond["age_upon_outcome_in_weeks"]["$gte"] == 20
-        assert age_cond["age_upon_outcome_in_weeks"]["$lte"] == 300
+        assert decoded["sex_upon_outcome"] == "Intact Female"
+        assert decoded["age_upon_outcome_in_weeks"] == {"$gte": 26, "$lte": 156}
+    
+    def test_bson_validates_input(self):
+        """Invalid filter type raises ValueError."""
+        with pytest.raises(ValueError):
+            build_rescue_query_bson("invalid")
+
+
+class TestGetRescue:
+    """Tests for the prebuilt (query, criteria) lookup."""
+    
+    @pytest.mark.parametrize("kind", ["all", "water", "mountain", "disaster"])
+    def test_matches_builders(self, kind):
+        """Prebuilt pairs equal the individually built query and criteria."""
+        query, criteria = get_rescue(kind)
+        
+        assert query == build_rescue_query(kind)
+        assert criteria == criteria_for_filter(kind)
+    
+    def test_rejects_invalid_filter(self):
+        """Unknown filters raise ValueError like validate_filter_type."""
+        with pytest.raises(ValueError):
+            get_rescue("invalid")
+    
+    def test_rejects_unhashable_filter(self):
+        """Unhashable input is reported as ValueError, not TypeError."""
+        with pytest.raises(ValueError):
+            get_rescue(["water"])
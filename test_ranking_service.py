@@ -5,208 +5,125 @@ Tests cover normal cases, edge cases, and boundary conditions to ensure
 the ranking algorithm produces correct scores and ordering.
 """
 
+from types import MappingProxyType
+
 import pytest
+from services import ranking_service
 from services.ranking_service import (
     MatchCriteria,
     BreedScore,
     RankingAlgorithm,
+    build_score_stages,
     criteria_for_filter,
     rank_results,
 )
 
 
+@pytest.fixture(scope="module")
+def water_criteria():
+    """Canonical water-rescue criteria (Labrador, 26-156 weeks, Intact Female)."""
+    return criteria_for_filter("water")
+
+
+@pytest.fixture(scope="module")
+def perfect_lab():
+    """Read-only dog record matching every water criterion; copy to vary it."""
+    return MappingProxyType({
+        "breed": "Labrador Retriever Mix",
+        "age_upon_outcome_in_weeks": 52,
+        "sex_upon_outcome": "Intact Female"
+    })
+
+
 class TestRankingAlgorithm:
     """Tests for the RankingAlgorithm scoring class."""
     
-    def test_score_dog_perfect_match(self):
+    def test_score_dog_perfect_match(self, perfect_lab, water_criteria):
         """A dog matching all criteria gets maximum score (100)."""
-        dog = {
-            "breed": "Labrador Retriever Mix",
-            "age_upon_outcome_in_weeks": 52,
-            "sex_upon_outcome": "Intact Female"
-        }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
-        
-        score = RankingAlgorithm.score_dog(dog, criteria)
+        score = RankingAlgorithm.score_dog(perfect_lab, water_criteria)
         
         assert score.breed_match == 50
         assert score.age_match == 30
         assert score.sex_match == 20
         assert score.total_score == 100
     
-    def test_score_dog_breed_only(self):
+    def test_score_dog_breed_only(self, perfect_lab, water_criteria):
         """A dog matching only breed gets 50 points."""
         dog = {
-            "breed": "Labrador Retriever Mix",
+            **perfect_lab,
             "age_upon_outcome_in_weeks": 10,  # Too young
             "sex_upon_outcome": "Intact Male"  # Wrong sex
         }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
         
-        score = RankingAlgorithm.score_dog(dog, criteria)
+        score = RankingAlgorithm.score_dog(dog, water_criteria)
         
         assert score.breed_match == 50
         assert score.age_match == 0
         assert score.sex_match == 0
         assert score.total_score == 50
     
-    def test_score_dog_age_only(self):
+    def test_score_dog_age_only(self, perfect_lab, water_criteria):
         """A dog matching only age gets 30 points."""
         dog = {
+            **perfect_lab,
             "breed": "Terrier Mix",  # Wrong breed
-            "age_upon_outcome_in_weeks": 52,
             "sex_upon_outcome": "Intact Male"  # Wrong sex
         }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
         
-        score = RankingAlgorithm.score_dog(dog, criteria)
+        score = RankingAlgorithm.score_dog(dog, water_criteria)
         
         assert score.breed_match == 0
         assert score.age_match == 30
         assert score.sex_match == 0
         assert score.total_score == 30
     
-    def test_score_dog_sex_only(self):
+    def test_score_dog_sex_only(self, perfect_lab, water_criteria):
         """A dog matching only sex gets 20 points."""
         dog = {
+            **perfect_lab,
             "breed": "Terrier Mix",  # Wrong breed
             "age_upon_outcome_in_weeks": 10,  # Too young
-            "sex_upon_outcome": "Intact Female"
         }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
         
-        score = RankingAlgorithm.score_dog(dog, criteria)
+        score = RankingAlgorithm.score_dog(dog, water_criteria)
         
         assert score.breed_match == 0
         assert score.age_match == 0
         assert score.sex_match == 20
         assert score.total_score == 20
     
-    def test_score_dog_no_matches(self):
+    def test_score_dog_no_matches(self, water_criteria):
         """A dog matching no criteria gets 0 points."""
         dog = {
             "breed": "Chihuahua",
             "age_upon_outcome_in_weeks": 500,  # Way too old
             "sex_upon_outcome": "Spayed Female"  # Not intact
         }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
         
-        score = RankingAlgorithm.score_dog(dog, criteria)
+        score = RankingAlgorithm.score_dog(dog, water_criteria)
         
         assert score.total_score == 0
     
-    def test_score_age_boundary_minimum(self):
-        """A dog exactly at minimum age gets age points."""
-        dog = {
-            "breed": "Labrador Retriever Mix",
-            "age_upon_outcome_in_weeks": 26,  # Exactly minimum
-            "sex_upon_outcome": "Intact Female"
-        }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
-        
-        score = RankingAlgorithm.score_dog(dog, criteria)
-        
-        assert score.age_match == 30
-        assert score.total_score == 100
+    @pytest.mark.parametrize("age,expected_age_pts,total", [
+        (26, 30, 100),  # Exactly minimum
+        (156, 30, 100),  # Exactly maximum
+        (25, 0, 70),  # One week too young: only breed + sex
+        (157, 0, 70),  # One week too old: only breed + sex
+    ])
+    def test_score_age_boundaries(self, perfect_lab, water_criteria, age, expected_age_pts, total):
+        """Age bounds are inclusive; one week outside either bound scores 0 age points."""
+        dog = {**perfect_lab, "age_upon_outcome_in_weeks": age}
+        
+        score = RankingAlgorithm.score_dog(dog, water_criteria)
+        
+        assert score.age_match == expected_age_pts
+        assert score.total_score == total
     
-    def test_score_age_boundary_maximum(self):
-        """A dog exactly at maximum age gets age points."""
-        dog = {
-            "breed": "Labrador Retriever Mix",
-            "age_upon_outcome_in_weeks": 156,  # Exactly maximum
-            "sex_upon_outcome": "Intact Female"
-        }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
-        
-        score = RankingAlgorithm.score_dog(dog, criteria)
-        
-        assert score.age_match == 30
-        assert score.total_score == 100
-    
-    def test_score_age_just_below_minimum(self):
-        """A dog just below minimum age gets 0 age points."""
-        dog = {
-            "breed": "Labrador Retriever Mix",
-            "age_upon_outcome_in_weeks": 25,  # One week too young
-            "sex_upon_outcome": "Intact Female"
-        }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
-        
-        score = RankingAlgorithm.score_dog(dog, criteria)
-        
-        assert score.age_match == 0
-        assert score.total_score == 70  # Only breed + sex
-    
-    def test_score_age_just_above_maximum(self):
-        """A dog just above maximum age gets 0 age points."""
-        dog = {
-            "breed": "Labrador Retriever Mix",
-            "age_upon_outcome_in_weeks": 157,  # One week too old
-            "sex_upon_outcome": "Intact Female"
-        }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
-        
-        score = RankingAlgorithm.score_dog(dog, criteria)
-        
-        assert score.age_match == 0
-        assert score.total_score == 70  # Only breed + sex
-    
-    def test_score_dog_missing_fields(self):
+    def test_score_dog_missing_fields(self, water_criteria):
         """Scoring handles missing fields gracefully."""
         dog = {"breed": "Labrador Retriever Mix"}  # Missing age and sex
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
         
-        score = RankingAlgorithm.score_dog(dog, criteria)
+        score = RankingAlgorithm.score_dog(dog, water_criteria)
         
         # Should score only breed (50), no crash
         assert score.breed_match == 50
@@ -214,63 +131,56 @@ class TestRankingAlgorithm:
         assert score.sex_match == 0
         assert score.total_score == 50
     
-    def test_score_dog_null_age(self):
+    def test_score_dog_null_age(self, perfect_lab, water_criteria):
         """Scoring handles null age field."""
-        dog = {
-            "breed": "Labrador Retriever Mix",
-            "age_upon_outcome_in_weeks": None,  # Null age
-            "sex_upon_outcome": "Intact Female"
-        }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
+        dog = {**perfect_lab, "age_upon_outcome_in_weeks": None}  # Null age
         
-        score = RankingAlgorithm.score_dog(dog, criteria)
+        score = RankingAlgorithm.score_dog(dog, water_criteria)
         
         assert score.age_match == 0
         assert score.total_score == 70  # Breed + sex, no age
     
-    def test_score_dog_string_age(self):
+    def test_score_dog_string_age(self, perfect_lab, water_criteria):
         """Scoring handles non-numeric age gracefully."""
-        dog = {
-            "breed": "Labrador Retriever Mix",
-            "age_upon_outcome_in_weeks": "52 weeks",  # String instead of number
-            "sex_upon_outcome": "Intact Female"
-        }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
+        dog = {**perfect_lab, "age_upon_outcome_in_weeks": "52 weeks"}  # String instead of number
         
-        score = RankingAlgorithm.score_dog(dog, criteria)
+        score = RankingAlgorithm.score_dog(dog, water_criteria)
         
         assert score.age_match == 0
         assert score.total_score == 70  # Breed + sex, no age
     
-    def test_score_dog_float_age(self):
+    def test_score_dog_float_age(self, perfect_lab, water_criteria):
         """Scoring correctly handles floating-point age values."""
-        dog = {
-            "breed": "Labrador Retriever Mix",
-            "age_upon_outcome_in_weeks": 52.5,  # Float age
-            "sex_upon_outcome": "Intact Female"
-        }
-        criteria = MatchCriteria(
-            preferred_breeds={"Labrador Retriever Mix"},
-            min_weeks=26,
-            max_weeks=156,
-            preferred_sex="Intact Female"
-        )
+        dog = {**perfect_lab, "age_upon_outcome_in_weeks": 52.5}  # Float age
         
-        score = RankingAlgorithm.score_dog(dog, criteria)
+        score = RankingAlgorithm.score_dog(dog, water_criteria)
         
         assert score.age_match == 30
         assert score.total_score == 100
 
+    def test_score_dog_custom_criteria_use_own_breeds(self):
+        """Custom criteria are scored against their own preferred_breeds."""
+        dog = {"breed": "Poodle", "age_upon_outcome_in_weeks": 52, "sex_upon_outcome": "Intact Female"}
+        water = criteria_for_filter("water")
+        custom = MatchCriteria(frozenset({"Poodle"}), water.min_weeks, water.max_weeks, water.preferred_sex)
+
+        assert RankingAlgorithm.score_dog(dog, custom).breed_match == 50
+        assert RankingAlgorithm.score_dog(dog, water).breed_match == 0
+
+    def test_score_dog_all_filter_returns_zero_score(self, perfect_lab):
+        """Empty criteria short-circuit to an all-zero BreedScore."""
+        score = RankingAlgorithm.score_dog(perfect_lab, criteria_for_filter("all"))
+        
+        assert score == BreedScore(0, 0, 0)
+    
+    def test_weights_array_matches_weight_constants(self):
+        """WEIGHTS holds the breed/age/sex weights in that order."""
+        assert RankingAlgorithm.WEIGHTS.tolist() == [
+            RankingAlgorithm.BREED_WEIGHT,
+            RankingAlgorithm.AGE_WEIGHT,
+            RankingAlgorithm.SEX_WEIGHT,
+        ]
+
 
 class TestCriteriaForFilter:
     """Tests for criteria_for_filter function."""
@@ -279,11 +189,12 @@ class TestCriteriaForFilter:
         """Water filter returns correct criteria."""
         criteria = criteria_for_filter("water")
         
-        assert criteria.preferred_breeds == {
+        assert criteria.preferred_breeds == frozenset({
             "Labrador Retriever Mix",
             "Chesapeake Bay Retriever",
             "Newfoundland"
-        }
+        })
+        assert isinstance(criteria.preferred_breeds, frozenset)
         assert criteria.min_weeks == 26
         assert criteria.max_weeks == 156
         assert criteria.preferred_sex == "Intact Female"
@@ -317,6 +228,31 @@ class TestCriteriaForFilter:
         assert criteria.max_weeks is None
         assert criteria.preferred_sex is None
 
+    def test_criteria_are_cached(self):
+        """Repeated lookups return the same shared, hashable instance."""
+        criteria = criteria_for_filter("water")
+
+        assert criteria_for_filter("water") is criteria
+        assert isinstance(criteria.preferred_breeds, frozenset)
+        assert hash(criteria) == hash(criteria_for_filter("water"))
+
+    def test_breed_arrays_are_prebuilt_and_sorted(self):
+        """Filter breed sets map to one shared, sorted array for np.isin."""
+        breeds = criteria_for_filter("mountain").preferred_breeds
+        
+        arr = ranking_service._breed_array(breeds)
+        
+        assert arr is ranking_service._breed_array(breeds)
+        assert arr.tolist() == sorted(breeds)
+    
+    def test_all_criteria_is_shared_sentinel(self):
+        """'all' and unknown filters reuse one empty MatchCriteria instance."""
+        criteria = criteria_for_filter("all")
+
+        assert criteria_for_filter("all") is criteria
+        assert criteria_for_filter("unknown") is criteria
+        assert criteria == MatchCriteria()
+
 
 class TestRankResults:
     """Tests for rank_results function."""
@@ -356,16 +292,9 @@ class TestRankResults:
         assert ranked[2]["breed"] == "Chihuahua"
         assert ranked[2]["match_score"] == 0
     
-    def test_rank_results_includes_score_breakdown(self):
+    def test_rank_results_includes_score_breakdown(self, perfect_lab, water_criteria):
         """Ranked results include score breakdown details."""
-        dogs = [{
-            "breed": "Labrador Retriever Mix",
-            "age_upon_outcome_in_weeks": 52,
-            "sex_upon_outcome": "Intact Female"
-        }]
-        criteria = criteria_for_filter("water")
-        
-        ranked = rank_results(dogs, criteria)
+        ranked = rank_results([perfect_lab], water_criteria)
         
         assert "match_score" in ranked[0]
         assert "score_breakdown" in ranked[0]
@@ -373,6 +302,15 @@ class TestRankResults:
         assert "age_match" in ranked[0]["score_breakdown"]
         assert "sex_match" in ranked[0]["score_breakdown"]
     
+    @pytest.mark.parametrize("n", [1, 64])
+    def test_rank_results_no_breakdown(self, n, perfect_lab, water_criteria):
+        """include_breakdown=False adds only match_score on both scoring paths."""
+        ranked = rank_results([perfect_lab] * n, water_criteria, include_breakdown=False)
+        
+        assert len(ranked) == n
+        assert all(r["match_score"] == 100 for r in ranked)
+        assert all("score_breakdown" not in r for r in ranked)
+    
     def test_rank_results_empty_list(self):
         """Ranking handles empty input gracefully."""
         criteria = criteria_for_filter("water")
@@ -419,6 +357,18 @@ class TestRankResults:
         
         assert ranked[0]["match_score"] == 0
     
+    @pytest.mark.parametrize("n", [3, 64])
+    @pytest.mark.parametrize("top_k", [None, 0, 2, 100])
+    def test_rank_results_all_filter_short_circuit_matches_scoring(self, n, top_k):
+        """The 'all' shortcut returns what scoring an equal empty criteria would."""
+        dogs = [{"breed": "Newfoundland", "age_upon_outcome_in_weeks": i} for i in range(n)]
+        
+        fast = rank_results(dogs, criteria_for_filter("all"), top_k=top_k)
+        scored = rank_results(dogs, MatchCriteria(), top_k=top_k)
+        
+        assert fast == scored
+        assert all("match_score" not in d for d in dogs)
+    
     def test_rank_results_tie_ordering(self):
         """Dogs with same score maintain input order (stable sort)."""
         dogs = [
@@ -434,6 +384,61 @@ class TestRankResults:
         assert ranked[0]["breed"] == "Terrier"
         assert ranked[1]["breed"] == "Poodle"
         assert ranked[2]["breed"] == "Collie"
+
+    def test_rank_results_matches_score_dog(self):
+        """Vectorized ranking agrees with per-dog scoring, including bad data."""
+        dogs = [
+            {"breed": "Newfoundland", "age_upon_outcome_in_weeks": 26, "sex_upon_outcome": "Intact Female"},
+            {"breed": None, "age_upon_outcome_in_weeks": 52, "sex_upon_outcome": "Intact Female"},
+            {"breed": "Newfoundland", "age_upon_outcome_in_weeks": "52 weeks"},
+            {"age_upon_outcome_in_weeks": None, "sex_upon_outcome": None},
+            {"breed": "Terrier Mix", "age_upon_outcome_in_weeks": 156.0, "sex_upon_outcome": "Intact Male"},
+        ]
+        criteria = criteria_for_filter("water")
+
+        ranked = rank_results(dogs, criteria)
+
+        expected = sorted(
+            (RankingAlgorithm.score_dog(dog, criteria).total_score for dog in dogs),
+            reverse=True,
+        )
+        assert [r["match_score"] for r in ranked] == expected
+        for record in ranked:
+            breakdown = record["score_breakdown"]
+            assert sum(breakdown.values()) == record["match_score"]
+
+    @pytest.mark.parametrize("n", [3, 40])
+    def test_rank_results_mutate_scores_in_place(self, n):
+        """mutate=True returns the caller's dicts; the default leaves them untouched."""
+        criteria = criteria_for_filter("water")
+        
+        rows = [{"breed": "Newfoundland", "idx": i} for i in range(n)]
+        copied = rank_results(rows, criteria)
+        assert all("match_score" not in r for r in rows)
+        assert all(a is not b for a, b in zip(copied, rows))
+        
+        ranked = rank_results(rows, criteria, mutate=True)
+        assert all(a is b for a, b in zip(ranked, rows))
+        assert all(r["match_score"] == 50 for r in rows)
+    
+    @pytest.mark.parametrize("top_k", [None, 0, 3, 40])
+    def test_rank_results_small_and_vectorized_paths_agree(self, top_k, monkeypatch):
+        """The per-record small-input path ranks exactly like the NumPy path."""
+        dogs = [
+            {"breed": "Newfoundland", "age_upon_outcome_in_weeks": 26, "sex_upon_outcome": "Intact Female"},
+            {"breed": None, "age_upon_outcome_in_weeks": 52, "sex_upon_outcome": "Intact Female"},
+            {"breed": "Newfoundland", "age_upon_outcome_in_weeks": "52 weeks"},
+            {"age_upon_outcome_in_weeks": None, "sex_upon_outcome": None},
+            {"breed": "Terrier Mix", "age_upon_outcome_in_weeks": 156.0, "sex_upon_outcome": "Intact Male"},
+        ]
+        rows = [dict(dog, idx=i) for i, dog in enumerate(dogs * 6)]
+        criteria = criteria_for_filter("water")
+        
+        small = rank_results(rows, criteria, top_k=top_k)
+        monkeypatch.setattr(ranking_service, "VECTORIZE_MIN_ROWS", 0)
+        vectorized = rank_results(rows, criteria, top_k=top_k)
+        
+        assert small == vectorized
     
     def test_rank_results_mixed_disaster_dogs(self):
         """Test ranking with disaster rescue dogs."""
@@ -470,19 +475,41 @@ class TestRankResults:
         assert ranked[2]["breed"] == "German Shepherd"
         assert ranked[2]["match_score"] == 70  # breed + sex only
     
-    def test_rank_results_preserves_all_fields(self):
+    def test_rank_results_top_k(self):
+        """top_k returns the same prefix as a full ranking, ties in input order."""
+        dogs = [
+            {"breed": "Terrier Mix", "age_upon_outcome_in_weeks": 52, "sex_upon_outcome": "Intact Male"},
+            {"breed": "Newfoundland", "age_upon_outcome_in_weeks": 52, "sex_upon_outcome": "Intact Female"},
+            {"breed": "Poodle", "age_upon_outcome_in_weeks": 40, "sex_upon_outcome": "Intact Male"},
+            {"breed": "Collie", "age_upon_outcome_in_weeks": 60, "sex_upon_outcome": "Intact Male"},
+        ]
+        criteria = criteria_for_filter("water")
+
+        full = rank_results(dogs, criteria)
+        top = rank_results(dogs, criteria, top_k=3)
+
+        assert len(top) == 3
+        assert [r["breed"] for r in top] == [r["breed"] for r in full[:3]]
+        assert [r["breed"] for r in top] == ["Newfoundland", "Terrier Mix", "Poodle"]
+
+    def test_rank_results_top_k_larger_than_input(self):
+        """top_k beyond the input size returns every record."""
+        dogs = [{"breed": "Newfoundland"}, {"breed": "Poodle"}]
+
+        ranked = rank_results(dogs, criteria_for_filter("water"), top_k=10)
+
+        assert len(ranked) == 2
+
+    def test_rank_results_preserves_all_fields(self, perfect_lab, water_criteria):
         """Ranking preserves all original fields in records."""
         dogs = [{
-            "breed": "Labrador Retriever Mix",
-            "age_upon_outcome_in_weeks": 52,
-            "sex_upon_outcome": "Intact Female",
+            **perfect_lab,
             "animal_id": "A12345",
             "color": "Yellow",
             "name": "Buddy"
         }]
-        criteria = criteria_for_filter("water")
         
-        ranked = rank_results(dogs, criteria)
+        ranked = rank_results(dogs, water_criteria)
         
         # All original fields should still be present
         assert ranked[0]["animal_id"] == "A12345"
@@ -490,15 +517,63 @@ class TestRankResults:
         assert ranked[0]["name"] == "Buddy"
 
 
+class TestBuildScoreStages:
+    """Tests for the server-side scoring stages."""
+    
+    def test_water_stages_use_ranking_weights(self):
+        """Each $cond awards the same weights as RankingAlgorithm."""
+        stages = build_score_stages(criteria_for_filter("water"))
+        
+        breakdown = stages[0]["$addFields"]["score_breakdown"]
+        assert breakdown["breed_match"]["$cond"][1] == RankingAlgorithm.BREED_WEIGHT
+        assert breakdown["age_match"]["$cond"][1] == RankingAlgorithm.AGE_WEIGHT
+        assert breakdown["sex_match"]["$cond"][1] == RankingAlgorithm.SEX_WEIGHT
+        assert set(breakdown["breed_match"]["$cond"][0]["$in"][1]) == {
+            "Labrador Retriever Mix",
+            "Chesapeake Bay Retriever",
+            "Newfoundland"
+        }
+    
+    def test_stages_add_match_score_total(self):
+        """The final stage sums the breakdown into match_score."""
+        stages = build_score_stages(criteria_for_filter("disaster"))
+        
+        assert "$add" in stages[-1]["$addFields"]["match_score"]
+    
+    def test_without_breakdown_adds_only_match_score(self):
+        """include_breakdown=False emits a single stage with no sub-document."""
+        stages = build_score_stages(criteria_for_filter("water"), include_breakdown=False)
+        
+        assert len(stages) == 1
+        assert list(stages[0]["$addFields"]) == ["match_score"]
+        assert len(stages[0]["$addFields"]["match_score"]["$add"]) == 3
+    
+    def test_empty_criteria_scores_zero(self):
+        """The 'all' filter scores every dimension as a literal 0."""
+        stages = build_score_stages(criteria_for_filter("all"))
+        
+        breakdown = stages[0]["$addFields"]["score_breakdown"]
+        assert all(v == {"$literal": 0} for v in breakdown.values())
+
+
 class TestBreedScoreDataClass:
     """Tests for BreedScore data structure."""
     
     def test_breed_score_immutable(self):
-        """BreedScore is immutable (frozen dataclass)."""
-        score = BreedScore(breed_match=50, age_match=30, sex_match=20, total_score=100)
+        """BreedScore is immutable (tuple-based)."""
+        score = BreedScore(breed_match=50, age_match=30, sex_match=20)
         
         with pytest.raises(AttributeError):
             score.total_score = 90
+        with pytest.raises(AttributeError):
+            score.breed_match = 0
+
+    def test_breed_score_unpacks_in_field_order(self):
+        """BreedScore unpacks as (breed, age, sex); the total is derived."""
+        score = BreedScore(breed_match=50, age_match=30, sex_match=0)
+
+        assert tuple(score) == (50, 30, 0)
+        assert score.total_score == 80
 
 
 class TestMatchCriteriaDataClass:
@@ -1,4 +1,6 @@
-from services.result_service import sanitize_record
+import sys
+
+from services.result_service import BATCH_MIN_ROWS, sanitize_record, sanitize_rows
 
 def test_sanitize_record_adds_required_fields():
     r = {"breed": "X"}
@@ -12,3 +14,50 @@ def test_sanitize_record_coerces_age_or_sets_none():
 
     out2 = sanitize_record({"age_upon_outcome_in_weeks": "bad"})
     assert out2["age_upon_outcome_in_weeks"] is None
+
+def test_sanitize_rows_mutates_in_place():
+    rows = [{"_id": 1, "breed": "X", "age_upon_outcome_in_weeks": 3}]
+    out = sanitize_rows(rows)
+    assert out is rows
+    assert "_id" not in rows[0]
+    assert rows[0]["age_upon_outcome_in_weeks"] == 3.0
+    assert rows[0]["name"] == ""
+
+def test_sanitize_record_interns_breed_and_sex():
+    breed = "".join(["Labrador ", "Retriever Mix"])  # built at runtime, not interned
+    out = sanitize_record({"breed": breed, "sex_upon_outcome": "".join(["Intact ", "Female"])})
+    assert out["breed"] is sanitize_record({"breed": "Labrador Retriever Mix"})["breed"]
+    assert out["sex_upon_outcome"] == "Intact Female"
+    assert sanitize_record({})["breed"] is None
+
+def test_sanitize_record_interns_and_strips():
+    out = sanitize_record({"breed": " Bloodhound ", "sex_upon_outcome": "Intact Male\n"})
+    assert out["breed"] is sys.intern("Bloodhound")
+    assert out["sex_upon_outcome"] is sys.intern("Intact Male")
+    bad = sanitize_record({"breed": 7, "sex_upon_outcome": ["x"]})
+    assert bad["breed"] is None and bad["sex_upon_outcome"] is None
+
+def test_sanitize_record_rejects_bool_age():
+    assert sanitize_record({"age_upon_outcome_in_weeks": True})["age_upon_outcome_in_weeks"] is None
+    assert sanitize_record({"age_upon_outcome_in_weeks": 4})["age_upon_outcome_in_weeks"] == 4.0
+
+def test_sanitize_rows_batch_matches_sanitize_record():
+    def make():
+        return [
+            row
+            for _ in range(BATCH_MIN_ROWS)
+            for row in (
+                {"_id": 1, "breed": "X", "age_upon_outcome_in_weeks": 3},
+                {"age_upon_outcome_in_weeks": False},
+                {"age_upon_outcome_in_weeks": "12"},
+                {"age_upon_outcome_in_weeks": None},
+                {"sex_upon_outcome": "Intact Male", "age_upon_outcome_in_weeks": 7.5},
+            )
+        ]
+    assert sanitize_rows(make()) == [sanitize_record(r) for r in make()]
+
+def test_sanitize_rows_batch_falls_back_on_unparseable_age():
+    rows = [{"age_upon_outcome_in_weeks": age} for _ in range(BATCH_MIN_ROWS) for age in ("bad", "4")]
+    out = sanitize_rows(rows)
+    assert out is rows
+    assert [r["age_upon_outcome_in_weeks"] for r in rows[:2]] == [None, 4.0]